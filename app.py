@@ -1,9 +1,18 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template
 import os
+import hashlib
 import threading
+from concurrent.futures import TimeoutError as RecognizeTimeout
+import cv2
+import numpy as np
 from werkzeug.utils import secure_filename
 from flask_cors import CORS   #Import CORS
 from src.model.face_embedding import FaecEmbedding
+from src.utils.metrics import metrics, PROMETHEUS_CONTENT_TYPE
+from src.pipeline.enrollment_queue import EnrollmentQueue, EnrollmentQueueFull
+from src.utils.upload_archiver import UploadArchiver
+from src.model.face_recognizer import FaceRecognizer, FaceRecognizerConfig
+from src.pipeline.micro_batcher import MicroBatchRecognizer, MicroBatcherConfig, MicroBatcherBusy
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})   
@@ -13,13 +22,55 @@ ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png"}
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def train_student_model_async(usn, folder_path):
-    try:
-        faece_embedding = FaecEmbedding()
-        faece_embedding.initae_faec_embedding()
-        print(f"Model training completed for {usn}")
-    except Exception as e:
-        print(f"Error training model for {usn}: {e}")
+# One embedder per process; its model is loaded on first enrollment
+faece_embedding = FaecEmbedding()
+
+
+# Original uploads are written for audit in the background
+upload_archiver = UploadArchiver()
+
+RESULT_WAIT_SECONDS = 60
+
+
+def train_student_model(usn, folder_path, images=None, append=False):
+    # Only the uploaded student is (re-)embedded, from memory when possible;
+    # usn is already normalized by the endpoint
+    if images:
+        result = faece_embedding.enroll_images(usn, images, append=append)
+    else:
+        result = faece_embedding.enroll_student(usn, folder_path)
+    print(f"Model training completed for {usn}")
+    return result
+
+
+# Fixed worker pool; repeated uploads of one USN collapse into one job
+enrollment_queue = EnrollmentQueue(train_student_model)
+
+
+# Warm recognizer behind a micro-batcher, started on the first /recognize call
+RECOGNIZE_BATCH = MicroBatcherConfig(max_batch_size=16, max_wait_ms=10)
+RECOGNIZE_TIMEOUT_SECONDS = 30
+GALLERY_WATCH_SECONDS = 5
+recognition_service = None
+recognition_service_lock = threading.Lock()
+
+
+def get_recognition_service():
+    global recognition_service
+    with recognition_service_lock:
+        if recognition_service is None:
+            recognizer = FaceRecognizer(FaceRecognizerConfig(
+                annotation_mode="off",
+                frame_batch_size=RECOGNIZE_BATCH.max_batch_size,
+                gallery_watch_seconds=GALLERY_WATCH_SECONDS,    # new enrollments show up without a restart
+            ))
+            recognition_service = MicroBatchRecognizer(recognizer, RECOGNIZE_BATCH)
+        return recognition_service
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
 
 
 @app.route("/upload", methods=["GET"])
@@ -29,35 +80,98 @@ def upload_form():
 
 @app.route("/upload_photos", methods=["POST"])
 def upload_photos():
-    usn = request.form.get("usn")
-    if not usn:
+    if not request.form.get("usn"):
         return jsonify({"status": "error", "message": "USN is required"}), 400
+    # One normalized USN for the queue key, the status lookup and the enrollment folder
+    usn = secure_filename(request.form["usn"])
+    if not usn:
+        return jsonify({"status": "error", "message": "Invalid USN"}), 400
 
     files = request.files.getlist("images")
     if not files or len(files) == 0:
         return jsonify({"status": "error", "message": "No images uploaded"}), 400
 
+    # "replace" (default): the upload becomes the student's enrolled set; "append": added to it
+    mode = request.form.get("mode", "replace")
+    if mode not in ("replace", "append"):
+        return jsonify({"status": "error", "message": "mode must be 'replace' or 'append'"}), 400
+
+    if not enrollment_queue.accepts(usn):
+        return too_many_enrollments()
+
     
-    save_dir = os.path.join(r"C:\ht\data\students", secure_filename(usn))
+    save_dir = os.path.join(r"C:\ht\data\students", usn)
     os.makedirs(save_dir, exist_ok=True)
 
-    saved_count = 0
-    for i, file in enumerate(files):
+    # Images stay in memory for enrollment; the originals are archived asynchronously
+    images = []
+    for file in files:
         if file and allowed_file(file.filename):
-            filename = secure_filename(f"image_{i+1}.jpg")
-            file.save(os.path.join(save_dir, filename))   # <-- Corrected line
-            saved_count += 1
+            data = file.read()
+            ext = file.filename.rsplit(".", 1)[1].lower()
+            filename = f"{hashlib.sha1(data).hexdigest()[:16]}.{ext}"   # re-uploads never overwrite
+            upload_archiver.submit(os.path.join(save_dir, filename), data)
+            images.append((secure_filename(file.filename), data))
 
-    if saved_count == 0:
+    if len(images) == 0:
         return jsonify({"status": "error", "message": "No valid image files uploaded"}), 400
 
-    
-    threading.Thread(target=train_student_model_async, args=(usn, save_dir)).start()
+    try:
+        job = enrollment_queue.submit(usn, save_dir, images, append=mode == "append")
+    except EnrollmentQueueFull:
+        return too_many_enrollments()
+
+    # ?results=1 waits for the job and returns the per-image face-found results
+    if request.args.get("results") or request.form.get("results"):
+        job.wait(RESULT_WAIT_SECONDS)
 
     return jsonify({
         "status": "success",
-        "message": f"{saved_count} images saved for {usn}, model training started."
-    })
+        "message": f"{len(images)} images received for {usn}, model training {job.state}.",
+        "enrollment": job.to_dict(),
+    }), 200 if job.state in ("done", "failed") else 202
+
+
+def too_many_enrollments():
+    metrics.inc("attendance_enrollments_rejected_total")
+    response = jsonify({"status": "error", "message": "Too many enrollments in progress, retry later"})
+    response.headers["Retry-After"] = "30"
+    return response, 429
+
+
+@app.route("/enroll_status/<usn>", methods=["GET"])
+def enroll_status(usn):
+    status = enrollment_queue.status(secure_filename(usn))
+    if status is None:
+        return jsonify({"status": "error", "message": f"No enrollment for {usn}"}), 404
+    return jsonify(status)
+
+
+@app.route("/recognize", methods=["POST"])
+def recognize():
+    # multipart "images" (one or more frames) or a raw encoded image as the body
+    blobs = [f.read() for f in request.files.getlist("images")] or [request.get_data()]
+    frames = []
+    for data in blobs:
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR) if data else None
+        if frame is None:
+            return jsonify({"status": "error", "message": "Could not decode image"}), 400
+        frames.append(frame)
+
+    try:
+        results = get_recognition_service().recognize(frames, timeout=RECOGNIZE_TIMEOUT_SECONDS)
+    except MicroBatcherBusy:
+        return recognition_unavailable("Recognition queue is full, retry later", 503)
+    except RecognizeTimeout:
+        metrics.inc("attendance_recognize_timeouts_total")
+        return recognition_unavailable("Recognition timed out, retry later", 504)
+
+    return jsonify({"status": "success", "frames": [{"faces": faces} for faces in results]})
+
+def recognition_unavailable(message, status):
+    response = jsonify({"status": "error", "message": message})
+    response.headers["Retry-After"] = "1"
+    return response, status
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -2,17 +2,26 @@ from src.utils.logger import logging
 from src.utils.exception import CustomException
 from src.component.capture.video_capture import VideoRecorder
 from src.component.capture.image_capture import ImageCapture
-from src.model.face_recognizer import FaceRecognizer
-from src.pipeline.attendence_counter import AttendanceMarker
+from src.component.capture.capture_service import CaptureService
+from src.model.face_recognizer import FaceRecognizer, FaceRecognizerConfig
+from src.model.multiscale_detector import MultiScaleDetectorConfig
+from src.pipeline.attendence_counter import AttendanceMarker, StreamingAttendanceCounter
+from src.pipeline.attendance_outbox import AttendancePublisher, AttendanceOutboxConfig
 from src.data_preprocessing.image_selector import ImageSelector
 from src.data_preprocessing.video_to_image import VideoToImage
+from src.data_preprocessing.adaptive_sampler import AdaptiveFrameSampler
+from src.utils.metrics import metrics, profile_session, serve_metrics
 
 import sys
-from dataclasses import dataclass
+import argparse
+import threading
+import time
+from dataclasses import dataclass, field
 import json
 from datetime import datetime, timezone
 import os
-import requests
+import uuid
+import numpy as np
 
 # New import
 from flask import Flask, jsonify
@@ -20,14 +29,53 @@ from flask import Flask, jsonify
 
 @dataclass
 class MainConfig:
-    pass
+    stream_frames: bool = True      # decode -> recognize in memory, no raw_frames round trip
+    save_raw_frames: bool = False   # optional JPEG side sink while streaming
+    frame_skip: int = 5
+    annotation_mode: str = "off"    # nobody looks at recognized_results/ in production
+    use_tracking: bool = True       # embed each face once per track (streaming only)
+    adaptive_sampling: bool = True  # scene-change sampling instead of a fixed frame_skip
+    early_stop: bool = True         # stop recognizing once the roster is resolved (streaming only)
+    frame_budget: int = 0           # sampled frames a session may use; 0 = until the video ends
+    headless_recording: bool = False  # no preview window (servers without a display)
+    detection_mode: str = "full"    # "multiscale" = coarse pass + ROI/tile passes per camera
+    profile_dir: str = None         # cProfile every session into <profile_dir>/<session>.prof
+    gallery_watch_seconds: float = 0  # long-running processes pick up new enrollments this often
+    capture_sources: dict = None    # {camera: index/RTSP URL/file}; capture them live instead of recording one
+    publish_endpoint: str = "http://localhost:8080/attendance/bulk"
+    outbox_path: str = "C:/ht/outbox/attendance_outbox.db"
+    all_students: list = field(default_factory=lambda: [
+        "kiran", "prasana", "suhas", "manoj","avinash","4AL23CD055"
+    ])
+    # Student USN mapping
+    usn_map: dict = field(default_factory=lambda: {
+        "kiran": "4AL23IS024",
+        "manoj": "4AL22IS400",
+        "suhas": "4AL23IS050",
+        "prasana": "4AL23IS042",
+        "avinash":"4AL23IS011",
+        "4AL23CD055":"4AL23CD055"
+    })
 
 
 class Main:
-    def __init__(self):
+    def __init__(self, face_recognizer=None, config: MainConfig = None, publisher=None):
+        """
+        face_recognizer: Optional warm FaceRecognizer shared between several
+            Main instances (e.g. one per room in the timetable scheduler).
+        publisher: Optional shared AttendancePublisher (same reason).
+        """
         try:
-            self.face_recognizer = FaceRecognizer()
-            self.attendance_counter = AttendanceMarker()
+            self.config = config or MainConfig()
+            self.face_recognizer = face_recognizer or FaceRecognizer(
+                FaceRecognizerConfig(annotation_mode=self.config.annotation_mode,
+                                     detection_mode=self.config.detection_mode,
+                                     gallery_watch_seconds=self.config.gallery_watch_seconds)
+            )
+            self.attendance_counter = AttendanceMarker(self.face_recognizer)
+            self.publisher = publisher or AttendancePublisher(AttendanceOutboxConfig(
+                db_path=self.config.outbox_path, endpoint=self.config.publish_endpoint
+            ))
             self.video_recorder = VideoRecorder()
             self.image_capturer = ImageCapture()
             self.video_to_image = VideoToImage()
@@ -36,38 +84,135 @@ class Main:
             logging.error("Error initializing Main class")
             raise CustomException(e, sys)
 
-    def initiate_main(self):
+    def initiate_main(self, duration=5, camera_index=0, all_students=None, usn_map=None,
+                      session_name=None, sources=None):
+        """
+        Record one session and mark attendance.
+
+        duration: Seconds to record
+        camera_index: Camera index / RTSP URL to record from
+        all_students: Roster for this session (default: MainConfig.all_students)
+        usn_map: Student -> USN mapping (default: MainConfig.usn_map)
+        session_name: Optional suffix of the video file and result folder (e.g. the room)
+        sources: Optional {camera: source} captured concurrently through
+            CaptureService and tracked per camera, instead of recording
+            camera_index (default: MainConfig.capture_sources)
+        """
+        profile_name = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+        if session_name:
+            profile_name = f"{profile_name}_{session_name}"
+        with profile_session(self.config.profile_dir, profile_name), metrics.span("session"):
+            return self._initiate_main(duration, camera_index, all_students, usn_map, session_name, sources)
+
+    def _initiate_main(self, duration, camera_index, all_students, usn_map, session_name, sources):
         try:
-            # Step 1: Record video
-            recorded_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-            print("\n\nStart recording the video\n\n")
-            path_to_video_recorded = self.video_recorder.initiate_videorecorder()
-            print("\n\nEnd recording the video\n\n", path_to_video_recorded)
-
-            # Ensure path is string
-            path_to_video_recorded = str(path_to_video_recorded)
-            print("Recorded video path:", path_to_video_recorded)
-
-            # Step 2: Convert video into frames
-            print("\n\nStart converting the video to images\n\n")
-            path_to_raw_frames = self.video_to_image.video_to_frames(
-                path_to_video_recorded, frame_skip=5
-            )
-            print("Frames saved at:", path_to_raw_frames)
+            all_students = all_students if all_students is not None else self.config.all_students
+            usn = usn_map if usn_map is not None else self.config.usn_map
+            sources = sources if sources is not None else self.config.capture_sources
 
-            # Step 3: Recognize faces
-            print("\n\nStart recognizing the images in the selected path\n\n")
-            students_per_image = self.face_recognizer.recognize_images_in_folder(
-                folder_path=path_to_raw_frames
+            recorded_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            counter = None
+            tracked = bool(sources) or (self.config.stream_frames and self.config.use_tracking)
+            if sources:
+                # Steps 1-3: capture every camera concurrently and track each camera
+                print("\n\nStart capturing and recognizing cameras:", list(sources), "\n\n")
+                recognition_start = time.perf_counter()
+                track_evidence, tracking_stats, counter = self.track_live(sources, duration, all_students)
+                print("\n\nEnd recognizing the cameras\n\n")
+            else:
+                # Step 1: Record video
+                print("\n\nStart recording the video\n\n")
+                with metrics.span("record"):
+                    path_to_video_recorded, capture_stats = self.video_recorder.initiate_videorecorder(
+                        duration=duration, camera_index=camera_index,
+                        headless=self.config.headless_recording, return_stats=True,
+                        session_name=session_name,
+                    )
+                print("\n\nEnd recording the video\n\n", path_to_video_recorded)
+                print("Capture stats:", capture_stats)
+
+                # Ensure path is string
+                path_to_video_recorded = str(path_to_video_recorded)
+                print("Recorded video path:", path_to_video_recorded)
+
+                recognition_start = time.perf_counter()
+                self.face_recognizer.start_session(camera_index)
+
+                if self.config.stream_frames:
+                    # Step 2 + 3: Stream decoded frames straight into recognition
+                    print("\n\nStart recognizing the frames of the recorded video\n\n")
+                    save_dir = None
+                    if self.config.save_raw_frames:
+                        video_name = os.path.splitext(os.path.basename(path_to_video_recorded))[0]
+                        save_dir = os.path.join("raw_frames", video_name)
+                    sampler = AdaptiveFrameSampler() if self.config.adaptive_sampling else None
+                    frames = self.video_to_image.iter_frames(
+                        path_to_video_recorded, frame_skip=self.config.frame_skip,
+                        save_dir=save_dir, sampler=sampler,
+                    )
+                    counter = self.make_counter(all_students)
+                    on_frame = counter.update if counter is not None else None
+
+                    # decoding is pulled lazily by recognition, so both are one span
+                    with metrics.span("decode_recognize"):
+                        if self.config.use_tracking:
+                            track_evidence, tracking_stats = self.face_recognizer.track_frames(
+                                frames, sampler=sampler, on_frame=on_frame, camera=camera_index
+                            )
+                        else:
+                            students_per_image = self.face_recognizer.recognize_frames(
+                                frames, sampler=sampler, on_frame=on_frame, structured=True,
+                                camera=camera_index
+                            )
+                    if counter is not None and counter.stopped_early:
+                        print(f"Roster resolved early after {counter.frames_seen} frames")
+                    if sampler is not None:
+                        print("Sampler stats:", sampler.stats())
+                    print("\n\nEnd recognizing the images\n\n")
+                else:
+                    # Step 2: Convert video into frames
+                    print("\n\nStart converting the video to images\n\n")
+                    with metrics.span("decode"):
+                        path_to_raw_frames = self.video_to_image.video_to_frames(
+                            path_to_video_recorded, frame_skip=self.config.frame_skip
+                        )
+                    print("Frames saved at:", path_to_raw_frames)
+
+                    # Step 3: Recognize faces
+                    print("\n\nStart recognizing the images in the selected path\n\n")
+                    with metrics.span("recognize"):
+                        students_per_image = self.face_recognizer.recognize_images_in_folder(
+                            folder_path=path_to_raw_frames, structured=True
+                        )
+                    print("\n\nEnd recognizing the images\n\n")
+
+            # Counted from this session's own output; the global counters are
+            # shared with rooms recognizing at the same time
+            if tracked:
+                session_frames = tracking_stats["frames"]
+                session_faces = tracking_stats["detections"]
+                session_unknown = sum(e["frames"] for e in track_evidence if e["name"] == "Unknown")
+            else:
+                session_frames = len(students_per_image.frame_names)
+                session_faces = len(students_per_image)
+                session_unknown = int(np.sum(students_per_image.records["identity"] == -1))
+            self.record_session_rates(
+                session_name or "default", time.perf_counter() - recognition_start,
+                session_frames, session_faces, session_unknown,
             )
-            print("\n\nEnd recognizing the images\n\n")
 
             # Step 4: Mark attendance
-            all_students = ["kiran", "prasana", "suhas", "manoj","avinash","4AL23CD055"]
-
-            Present, Absent = self.attendance_counter.initiate_mark_attendance(
-                students_per_image, all_students, threshold=2, min_conf=0.4
-            )
+            with metrics.span("aggregate"):
+                if counter is not None:
+                    Present, Absent = counter.result()
+                elif tracked:
+                    Present, Absent = self.attendance_counter.mark_attendance_from_tracks(
+                        track_evidence, all_students, threshold=2, min_conf=0.4
+                    )
+                else:
+                    Present, Absent = self.attendance_counter.initiate_mark_attendance(
+                        students_per_image, all_students, threshold=2, min_conf=0.4
+                    )
 
             print("Present:", Present)
             print("Absent:", Absent)
@@ -77,22 +222,13 @@ class Main:
             os.makedirs(base_dir, exist_ok=True)
 
             folder_name = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+            if session_name:
+                folder_name = f"{folder_name}_{session_name}"
             folder_path = os.path.join(base_dir, folder_name)
             os.makedirs(folder_path, exist_ok=True)
 
             file_path = os.path.join(folder_path, "attendance.json")
 
-            # Student USN mapping
-            usn = {
-                "kiran": "4AL23IS024",
-                "manoj": "4AL22IS400",
-                "suhas": "4AL23IS050",
-                "prasana": "4AL23IS042",
-                "avinash":"4AL23IS011",
-                "4AL23CD055":"4AL23CD055"
-
-            }
-
             # Example lists
          
 
@@ -119,12 +255,15 @@ class Main:
             with open(file_path, "w") as f:
                 json.dump(result, f, indent=4)
 
-            r = requests.post("http://localhost:8080/attendance/bulk", json=result)
-             
-            print(r)
+            # Step 6: Queue for the backend; the publisher sends it in the background
+            with metrics.span("publish"):
+                session_key = self.publisher.publish(
+                    result, session_key=f"{folder_name}_{uuid.uuid4().hex[:8]}"
+                )
+
+            print("Queued for publishing:", session_key)
             print("Saved at:", file_path)
             print(result)
-            print(r.json())
 
             return result  # Return JSON instead of string
 
@@ -132,6 +271,76 @@ class Main:
             logging.error("Error in initiate_main")
             raise CustomException(e, sys)
 
+    def make_counter(self, all_students):
+        """Early-stop counter of a streaming session, or None"""
+        if not self.config.early_stop:
+            return None
+        return StreamingAttendanceCounter(
+            all_students, threshold=2, min_conf=0.4, frame_budget=self.config.frame_budget
+        )
+
+    def track_live(self, sources, duration, all_students):
+        """
+        Capture every source concurrently for `duration` seconds and track
+        straight from the ring buffers, one tracker/detector per camera.
+
+        Live sessions always track (MainConfig.use_tracking is not consulted)
+        and sample each camera on its own.
+
+        Returns:
+            (list, dict, StreamingAttendanceCounter | None): Track evidence,
+            tracking stats and the early-stop counter.
+        """
+        for camera in sources:
+            self.face_recognizer.start_session(camera)
+        samplers = {camera: AdaptiveFrameSampler() for camera in sources} if self.config.adaptive_sampling else {}
+        counter = self.make_counter(all_students)
+        on_frame = counter.update if counter is not None else None
+
+        service = CaptureService(sources).start()
+        try:
+            frames = self.sample_camera_frames(service.frames(duration=duration), samplers)
+            with metrics.span("capture_recognize"):
+                track_evidence, tracking_stats = self.face_recognizer.track_cameras(
+                    frames, samplers=samplers, on_frame=on_frame
+                )
+        finally:
+            service.stop()
+
+        capture_stats = service.stats()
+        print("Capture stats:", capture_stats)
+        for camera, stats in capture_stats.items():
+            metrics.set("attendance_capture_fps", stats["fps"], camera=camera)
+            metrics.set("attendance_capture_dropped_frames", stats["dropped"], camera=camera)
+        if counter is not None and counter.stopped_early:
+            print(f"Roster resolved early after {counter.frames_seen} frames")
+        for camera, sampler in samplers.items():
+            print(f"Sampler stats ({camera}):", sampler.stats())
+        return track_evidence, tracking_stats, counter
+
+    def sample_camera_frames(self, camera_frames, samplers):
+        """Per-camera frame_skip / adaptive sampling of CaptureService.frames()"""
+        seen = {}
+        for camera, img_name, frame in camera_frames:
+            index = seen.get(camera, 0)
+            seen[camera] = index + 1
+            sampler = samplers.get(camera)
+            if sampler is not None:
+                keep = sampler.should_sample(index, frame)
+            else:
+                keep = index % self.config.frame_skip == 0
+            if keep:
+                yield camera, img_name, frame
+
+    @staticmethod
+    def record_session_rates(session, seconds, frames, faces, unknown):
+        """Per-session throughput gauges (frames, faces and Unknowns of this session only)"""
+        seconds = max(seconds, 1e-9)
+        metrics.set("attendance_session_frames_per_second", round(frames / seconds, 2), session=session)
+        metrics.set("attendance_session_faces_per_second", round(faces / seconds, 2), session=session)
+        metrics.set("attendance_session_unknown_rate", round(unknown / max(faces, 1), 4), session=session)
+        metrics.inc("attendance_sessions_total", session=session)
+
 
 # # Flask app added here
 # app = Flask(__name__)
@@ -143,10 +352,78 @@ class Main:
 #     return jsonify(data)
 
 
+def run_timetable(timetable_path, profile_dir=None):
+    """
+    Run attendance sessions from a timetable, keeping the models warm.
+
+    The detector/recognizer and gallery are loaded once and shared by every
+    room's Main, so a session start only opens its camera.
+    """
+    from src.pipeline.attendance_scheduler import AttendanceScheduler
+
+    config = MainConfig(headless_recording=True, detection_mode="multiscale", profile_dir=profile_dir,
+                        gallery_watch_seconds=30)
+    publisher = AttendancePublisher(AttendanceOutboxConfig(
+        db_path=config.outbox_path, endpoint=config.publish_endpoint
+    ))
+    shared_recognizer = FaceRecognizer(FaceRecognizerConfig(
+        annotation_mode=config.annotation_mode, detection_mode=config.detection_mode,
+        gallery_watch_seconds=config.gallery_watch_seconds,
+    ))
+    rooms = {}
+    rooms_lock = threading.Lock()
+
+    def run_session(session):
+        with rooms_lock:
+            if session.room not in rooms:
+                rooms[session.room] = Main(
+                    face_recognizer=shared_recognizer, config=config, publisher=publisher
+                )
+                if session.detection:
+                    cameras = session.camera if isinstance(session.camera, dict) else [session.camera]
+                    for camera in cameras:
+                        shared_recognizer.set_camera_detection(
+                            camera, MultiScaleDetectorConfig(**session.detection)
+                        )
+        roster = session.roster
+        multi_camera = isinstance(session.camera, dict)
+        return rooms[session.room].initiate_main(
+            duration=session.duration,
+            camera_index=None if multi_camera else session.camera,
+            sources=session.camera if multi_camera else None,
+            all_students=list(roster) if roster else None,
+            usn_map=roster if isinstance(roster, dict) and roster else None,
+            session_name=session.room,
+        )
+
+    scheduler = AttendanceScheduler(timetable_path, run_session)
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.stop()
+    finally:
+        shared_recognizer.close()
+        publisher.close()
+
+
 if __name__ == "__main__":
     # Run Flask app
     # app.run(host="0.0.0.0", port=5000, debug=True)
-    obj=Main()
-    result=obj.initiate_main()
-    print(result)
+    parser = argparse.ArgumentParser(description="Record a session and mark attendance")
+    parser.add_argument("--timetable", help="Timetable JSON; run as a scheduling daemon")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus /metrics on this port")
+    parser.add_argument("--profile-dir", help="Dump a cProfile .prof per session here")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+
+    if args.timetable:
+        run_timetable(args.timetable, profile_dir=args.profile_dir)
+    else:
+        obj=Main(config=MainConfig(profile_dir=args.profile_dir))
+        result=obj.initiate_main()
+        print(result)
+        # Give the publisher a chance to deliver; anything unsent stays in the outbox
+        obj.publisher.close(timeout=15)
     
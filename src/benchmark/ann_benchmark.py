@@ -0,0 +1,111 @@
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from dataclasses import dataclass, asdict
+
+from src.model.gallery import FaceGallery, l2_normalize
+from src.model.ann_index import PrototypeIndex, IVFIndexConfig
+from src.utils.exception import CustomException
+from src.utils.logger import logging
+
+
+@dataclass
+class AnnBenchmarkConfig:
+    identities: int = 10000
+    prototypes_per_identity: int = 8
+    queries: int = 2000
+    dim: int = 512
+    noise: float = 0.9          # spread of prototypes / queries around an identity
+    neighbors: int = 10
+    n_probe: int = 8
+    seed: int = 0
+
+
+class AnnBenchmark:
+    """
+    Compare the brute-force mean-embedding matcher (FaceGallery) with the
+    multi-prototype IVF matcher (PrototypeIndex) on a synthetic gallery.
+    """
+
+    def __init__(self, config: AnnBenchmarkConfig = None):
+        self.config = config or AnnBenchmarkConfig()
+
+    def make_gallery(self):
+        cfg = self.config
+        rng = np.random.default_rng(cfg.seed)
+        centers = l2_normalize(rng.normal(size=(cfg.identities, cfg.dim)))
+        scale = cfg.noise / np.sqrt(cfg.dim)
+
+        prototypes = centers[:, None, :] + scale * rng.normal(
+            size=(cfg.identities, cfg.prototypes_per_identity, cfg.dim)
+        )
+        prototypes = l2_normalize(prototypes.astype(np.float32))
+
+        truth = rng.integers(0, cfg.identities, size=cfg.queries)
+        queries = l2_normalize(centers[truth] + scale * rng.normal(size=(cfg.queries, cfg.dim)))
+        return prototypes, queries.astype(np.float32), truth
+
+    @staticmethod
+    def _time_search(matcher, queries):
+        start = time.perf_counter()
+        names, _ = matcher.search(queries, top_k=1)
+        elapsed = time.perf_counter() - start
+        return names[:, 0], elapsed
+
+    def initiate_benchmark(self):
+        try:
+            cfg = self.config
+            prototypes, queries, truth = self.make_gallery()
+            person_names = np.array([f"id_{i}" for i in range(cfg.identities)], dtype=object)
+
+            start = time.perf_counter()
+            gallery = FaceGallery(person_names, prototypes.mean(axis=1))
+            mean_build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            index = PrototypeIndex.from_embeddings(
+                dict(zip(person_names, prototypes)),
+                neighbors=cfg.neighbors,
+                config=IVFIndexConfig(n_probe=cfg.n_probe),
+            )
+            ann_build = time.perf_counter() - start
+
+            results = {"config": asdict(cfg)}
+            for label, matcher, build in (("mean_bruteforce", gallery, mean_build),
+                                          ("ann_prototypes", index, ann_build)):
+                predicted, elapsed = self._time_search(matcher, queries)
+                results[label] = {
+                    "build_s": round(build, 4),
+                    "ms_per_face": round(1000 * elapsed / cfg.queries, 4),
+                    "top1_accuracy": round(float(np.mean(predicted == person_names[truth])), 4),
+                }
+
+            logging.info(f"ANN benchmark: {results}")
+            return results
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mean-embedding vs ANN prototype matching")
+    parser.add_argument("--identities", type=int, default=AnnBenchmarkConfig.identities)
+    parser.add_argument("--prototypes", type=int, default=AnnBenchmarkConfig.prototypes_per_identity)
+    parser.add_argument("--queries", type=int, default=AnnBenchmarkConfig.queries)
+    parser.add_argument("--n-probe", type=int, default=AnnBenchmarkConfig.n_probe)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    bench = AnnBenchmark(AnnBenchmarkConfig(
+        identities=args.identities,
+        prototypes_per_identity=args.prototypes,
+        queries=args.queries,
+        n_probe=args.n_probe,
+    ))
+    results = bench.initiate_benchmark()
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
@@ -0,0 +1,278 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import subprocess
+import cv2
+import numpy as np
+from itertools import islice
+from dataclasses import dataclass, asdict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.model.gallery import FaceGallery, l2_normalize
+from src.model.face_recognizer import FaceRecognizer, FaceRecognizerConfig
+from src.model.recognition_result import RecognitionResultBuilder
+from src.pipeline.attendence_counter import AttendanceMarker
+from src.data_preprocessing.video_to_image import VideoToImage
+from src.utils.exception import CustomException
+from src.utils.logger import logging
+
+
+@dataclass
+class PipelineBenchmarkConfig:
+    video_path: str = None          # recorded video; None = generate a synthetic classroom
+    frames: int = 150               # synthetic video length
+    width: int = 1280
+    height: int = 720
+    fps: int = 20
+    frame_skip: int = 5
+    faces_per_frame: int = 30       # stub detector output
+    identities: int = 1000          # gallery size
+    unknown_rate: float = 0.1       # stub faces that are not in the gallery
+    stub_models: bool = True        # False = real buffalo_l from C:/ht/models
+    frame_batch_size: int = 8
+    embed_batch_size: int = 32
+    seed: int = 0
+
+
+class StageTimer:
+    """Accumulates wall time and processed items per pipeline stage"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, stage, seconds, items):
+        entry = self.stages.setdefault(stage, {"seconds": 0.0, "calls": 0, "items": 0})
+        entry["seconds"] += seconds
+        entry["calls"] += 1
+        entry["items"] += items
+
+    def time(self, stage, fn, *args, items=1):
+        start = time.perf_counter()
+        out = fn(*args)
+        self.add(stage, time.perf_counter() - start, items)
+        return out
+
+    def report(self):
+        report = {}
+        for stage, entry in self.stages.items():
+            report[stage] = {
+                "total_s": round(entry["seconds"], 4),
+                "calls": entry["calls"],
+                "items": entry["items"],
+                "ms_per_item": round(1000 * entry["seconds"] / max(entry["items"], 1), 4),
+                "items_per_s": round(entry["items"] / max(entry["seconds"], 1e-9), 2),
+            }
+        return report
+
+
+class StubDetector:
+    """Detector stand-in: a fixed grid of faces with landmarks, no model weights"""
+
+    def __init__(self, faces_per_frame):
+        self.faces_per_frame = faces_per_frame
+
+    def detect(self, img, input_size=None, max_num=0, metric="default"):
+        h, w = img.shape[:2]
+        cols = int(np.ceil(np.sqrt(self.faces_per_frame)))
+        rows = int(np.ceil(self.faces_per_frame / cols))
+        size = min(w / cols, h / rows) * 0.6
+        bboxes, kpss = [], []
+        for i in range(self.faces_per_frame):
+            cx = (i % cols + 0.5) * w / cols
+            cy = (i // cols + 0.5) * h / rows
+            bboxes.append([cx - size / 2, cy - size / 2, cx + size / 2, cy + size / 2, 0.9])
+            kpss.append([[cx - size / 5, cy - size / 6], [cx + size / 5, cy - size / 6], [cx, cy],
+                         [cx - size / 6, cy + size / 5], [cx + size / 6, cy + size / 5]])
+        bboxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 5)
+        kpss = np.asarray(kpss, dtype=np.float32).reshape(-1, 5, 2)
+        if max_num > 0:
+            bboxes, kpss = bboxes[:max_num], kpss[:max_num]
+        return bboxes, kpss
+
+
+class StubRecognition:
+    """ArcFace stand-in: noisy gallery identities (or random unknowns) per crop"""
+
+    input_size = (112, 112)
+
+    def __init__(self, centers, unknown_rate, seed):
+        self.centers = centers
+        self.unknown_rate = unknown_rate
+        self.rng = np.random.default_rng(seed)
+
+    def get_feat(self, imgs):
+        n, dim = len(imgs), self.centers.shape[1]
+        feats = self.centers[self.rng.integers(0, len(self.centers), size=n)]
+        feats = feats + (0.5 / np.sqrt(dim)) * self.rng.normal(size=(n, dim))
+        unknown = self.rng.random(n) < self.unknown_rate
+        feats[unknown] = self.rng.normal(size=(int(unknown.sum()), dim))
+        return feats.astype(np.float32)
+
+
+class StubFaceAnalysis:
+    """Just enough of FaceAnalysis for BatchRecognitionEngine"""
+
+    def __init__(self, centers, config: PipelineBenchmarkConfig):
+        self.det_model = StubDetector(config.faces_per_frame)
+        self.models = {"recognition": StubRecognition(centers, config.unknown_rate, config.seed)}
+
+
+class PipelineBenchmark:
+    """
+    Times each stage of the Main.initiate_main pipeline separately:
+    decode (VideoToImage), detect, embed, match (FaceRecognizer) and
+    aggregate (AttendanceMarker), on a recorded or synthetic video and a
+    synthetic gallery of configurable size.
+    """
+
+    def __init__(self, config: PipelineBenchmarkConfig = None):
+        self.config = config or PipelineBenchmarkConfig()
+
+    def make_gallery(self):
+        cfg = self.config
+        rng = np.random.default_rng(cfg.seed)
+        centers = l2_normalize(rng.normal(size=(cfg.identities, 512)).astype(np.float32))
+        names = [f"id_{i}" for i in range(cfg.identities)]
+        return names, centers
+
+    def make_video(self, folder):
+        """Synthetic classroom: textured background with moving face-sized blobs"""
+        cfg = self.config
+        rng = np.random.default_rng(cfg.seed)
+        path = os.path.join(folder, "synthetic_classroom.mp4")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), cfg.fps, (cfg.width, cfg.height))
+        background = rng.integers(0, 255, size=(cfg.height, cfg.width, 3), dtype=np.uint8)
+        centers = rng.uniform([0, 0], [cfg.width, cfg.height], size=(cfg.faces_per_frame, 2))
+        for i in range(cfg.frames):
+            frame = background.copy()
+            for j, (x, y) in enumerate(centers):
+                shift = 5 * np.sin(i / 5 + j)
+                cv2.ellipse(frame, (int(x + shift), int(y)), (20, 26), 0, 0, 360, (150, 170, 200), -1)
+            writer.write(frame)
+        writer.release()
+        return path
+
+    def build_recognizer(self, names, centers):
+        cfg = self.config
+        recognizer_config = FaceRecognizerConfig(
+            annotation_mode="off",
+            use_packed_gallery=False,
+            frame_batch_size=cfg.frame_batch_size,
+            embed_batch_size=cfg.embed_batch_size,
+        )
+        app = StubFaceAnalysis(centers, cfg) if cfg.stub_models else None
+        recognizer = FaceRecognizer(recognizer_config, app=app, load_gallery=False)
+        recognizer.set_gallery(FaceGallery(names, centers, normalized=True))
+        return recognizer
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+            ).strip()
+        except Exception:
+            return None
+
+    def initiate_benchmark(self):
+        try:
+            cfg = self.config
+            timer = StageTimer()
+            names, centers = self.make_gallery()
+            recognizer = self.build_recognizer(names, centers)
+            engine = recognizer.engine
+            marker = AttendanceMarker(recognizer)
+
+            with tempfile.TemporaryDirectory() as folder:
+                video_path = cfg.video_path or self.make_video(folder)
+                frames = VideoToImage.iter_frames(video_path, frame_skip=cfg.frame_skip)
+                builder = RecognitionResultBuilder()
+                total_frames = total_faces = 0
+
+                started = time.perf_counter()
+                while True:
+                    decode_start = time.perf_counter()
+                    batch = list(islice(frames, engine.config.frame_batch_size))
+                    timer.add("decode", time.perf_counter() - decode_start, len(batch))
+                    if not batch:
+                        break
+                    images = [frame for _, frame in batch]
+
+                    detections = timer.time("detect", engine.detect, images, items=len(images))
+                    faces = [face for per_frame in detections for face in per_frame]
+                    embedded = timer.time("embed", engine.embed, images, faces, items=len(faces))
+                    matches = timer.time(
+                        "match", recognizer.recognize_faces,
+                        [face.normed_embedding for face in embedded], items=len(embedded)
+                    )
+
+                    start = 0
+                    for (img_name, _), per_frame in zip(batch, detections):
+                        per_frame = [f for f in per_frame if f.normed_embedding is not None]
+                        frame_matches = matches[start:start + len(per_frame)]
+                        builder.add_frame(img_name, [f.bbox for f in per_frame],
+                                          [m[0] for m in frame_matches])
+                        start += len(per_frame)
+                    total_frames += len(batch)
+                    total_faces += len(embedded)
+
+                result = builder.build()
+                timer.time(
+                    "aggregate", marker.initiate_mark_attendance, result, names, 2, 0.4,
+                    items=len(result)
+                )
+                elapsed = time.perf_counter() - started
+
+            unknown = float(np.mean(result.records["identity"] < 0)) if len(result) else 0.0
+            results = {
+                "commit": self.git_commit(),
+                "config": asdict(cfg),
+                "stages": timer.report(),
+                "end_to_end": {
+                    "frames": total_frames,
+                    "faces": total_faces,
+                    "seconds": round(elapsed, 4),
+                    "frames_per_s": round(total_frames / max(elapsed, 1e-9), 2),
+                    "faces_per_s": round(total_faces / max(elapsed, 1e-9), 2),
+                    "unknown_rate": round(unknown, 4),
+                },
+            }
+            logging.info(f"Pipeline benchmark: {results}")
+            return results
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage throughput of the attendance pipeline")
+    parser.add_argument("--video", help="Recorded video; default is a synthetic classroom")
+    parser.add_argument("--frames", type=int, default=PipelineBenchmarkConfig.frames)
+    parser.add_argument("--faces", type=int, default=PipelineBenchmarkConfig.faces_per_frame)
+    parser.add_argument("--identities", type=int, nargs="+", default=[PipelineBenchmarkConfig.identities],
+                        help="One run per gallery size, e.g. 10 1000 100000")
+    parser.add_argument("--frame-skip", type=int, default=PipelineBenchmarkConfig.frame_skip)
+    parser.add_argument("--real-models", action="store_true", help="Use buffalo_l instead of stubs")
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    runs = []
+    for identities in args.identities:
+        bench = PipelineBenchmark(PipelineBenchmarkConfig(
+            video_path=args.video,
+            frames=args.frames,
+            faces_per_frame=args.faces,
+            identities=identities,
+            frame_skip=args.frame_skip,
+            stub_models=not args.real_models,
+        ))
+        runs.append(bench.initiate_benchmark())
+
+    print(json.dumps(runs, indent=4))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(runs, f, indent=4)
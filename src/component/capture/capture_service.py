@@ -0,0 +1,239 @@
+import os
+import sys
+import time
+import threading
+import cv2
+import numpy as np
+from dataclasses import dataclass
+
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.utils.logger import logging
+
+
+@dataclass
+class CaptureServiceConfig:
+    """Configuration for concurrent multi-camera capture."""
+    buffer_size: int = 8            # preallocated frame slots per source
+    reconnect_delay: float = 1.0    # seconds before re-opening a failed live stream
+    max_reconnects: int = 10
+    pace_files: bool = False        # read video files at their native FPS (like a camera)
+
+
+class FrameRingBuffer:
+    """
+    Fixed-size ring of preallocated frames for one source.
+
+    The grabber decodes straight into the next free slot, which is never
+    readable. When the consumer falls behind, the oldest unread frame is
+    overwritten and counted as dropped, so capture never blocks on
+    recognition.
+    """
+
+    def __init__(self, capacity, frame_shape, dtype=np.uint8):
+        capacity = max(capacity, 2)     # one slot is always reserved for writing
+        self.frames = np.empty((capacity,) + tuple(frame_shape), dtype=dtype)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.sequence = np.zeros(capacity, dtype=np.int64)
+        self.capacity = capacity
+        self.head = 0       # next slot to write
+        self.count = 0      # unread frames
+        self.written = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def write_slot(self):
+        """Slot the producer decodes into; only valid until commit()"""
+        return self.frames[self.head]
+
+    def commit(self, timestamp):
+        with self.lock:
+            self.timestamps[self.head] = timestamp
+            self.sequence[self.head] = self.written
+            self.written += 1
+            self.head = (self.head + 1) % self.capacity
+            if self.count == self.capacity - 1:
+                self.dropped += 1      # oldest unread frame becomes the next write slot
+            else:
+                self.count += 1
+
+    def pop(self):
+        """Oldest unread frame as (sequence, timestamp, frame copy), or None"""
+        with self.lock:
+            if self.count == 0:
+                return None
+            tail = (self.head - self.count) % self.capacity
+            self.count -= 1
+            return int(self.sequence[tail]), float(self.timestamps[tail]), self.frames[tail].copy()
+
+
+class CaptureSource(threading.Thread):
+    """Grabs frames from one camera / RTSP URL / video file into a ring buffer."""
+
+    def __init__(self, name, source, config: CaptureServiceConfig, on_frame):
+        super().__init__(name=f"capture-{name}", daemon=True)
+        self.source_name = name
+        self.source = source
+        self.config = config
+        self.on_frame = on_frame
+        self.buffer = None
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.stopping = threading.Event()
+        self.finished = threading.Event()
+        self.read_failures = 0
+        self.reconnects = 0
+        self.fps = 0.0
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            raise IOError(f"Unable to open capture source {self.source}")
+        return cap
+
+    def run(self):
+        try:
+            cap = self._open()
+            ok, first = cap.read()
+            if not ok:
+                raise IOError(f"No frame from capture source {self.source}")
+
+            self.buffer = FrameRingBuffer(self.config.buffer_size, first.shape, first.dtype)
+            self.buffer.write_slot()[...] = first
+            self.buffer.commit(time.time())
+            self.on_frame()
+
+            frame_interval = 0.0
+            if self.is_file and self.config.pace_files:
+                frame_interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 25.0)
+
+            last = time.perf_counter()
+            while not self.stopping.is_set():
+                slot = self.buffer.write_slot()
+                ok, frame = cap.read(slot)
+                if not ok:
+                    if self.is_file or self.reconnects >= self.config.max_reconnects:
+                        break
+                    self.read_failures += 1
+                    self.reconnects += 1
+                    cap.release()
+                    time.sleep(self.config.reconnect_delay)
+                    cap = self._open()
+                    continue
+
+                if frame is not slot:   # decoder could not reuse the slot (size change)
+                    slot[...] = cv2.resize(frame, (slot.shape[1], slot.shape[0]))
+                self.buffer.commit(time.time())
+                self.on_frame()
+
+                now = time.perf_counter()
+                instant = 1.0 / max(now - last, 1e-6)
+                self.fps = instant if self.fps == 0.0 else 0.9 * self.fps + 0.1 * instant
+                last = now
+                if frame_interval:
+                    time.sleep(frame_interval)
+
+            cap.release()
+        except Exception as e:
+            logging.error(f"Capture source {self.source_name} stopped: {e}")
+        finally:
+            self.finished.set()
+            self.on_frame()
+
+    def stats(self):
+        return {
+            "fps": round(self.fps, 2),
+            "grabbed": self.buffer.written if self.buffer else 0,
+            "dropped": self.buffer.dropped if self.buffer else 0,
+            "read_failures": self.read_failures,
+            "reconnects": self.reconnects,
+            "finished": self.finished.is_set(),
+        }
+
+
+class CaptureService:
+    """
+    Captures N sources concurrently, one thread each, and feeds their frames
+    to a single recognition stage through frames().
+    """
+
+    def __init__(self, sources: dict, config: CaptureServiceConfig = None):
+        """
+        Args:
+            sources (dict): {name: camera index, RTSP URL or video file path}.
+        """
+        self.config = config or CaptureServiceConfig()
+        self.available = threading.Condition()
+        self.sources = {
+            name: CaptureSource(name, source, self.config, self._notify)
+            for name, source in sources.items()
+        }
+
+    def _notify(self):
+        with self.available:
+            self.available.notify_all()
+
+    def start(self):
+        logging.info(f"Starting capture for sources: {list(self.sources)}")
+        for source in self.sources.values():
+            source.start()
+        return self
+
+    def stop(self):
+        for source in self.sources.values():
+            source.stopping.set()
+        for source in self.sources.values():
+            source.join(timeout=5)
+        logging.info(f"Capture stopped: {self.stats()}")
+
+    def frames(self, timeout: float = 0.1, duration: float = None):
+        """
+        Round-robin over the sources' ring buffers.
+
+        Args:
+            duration: Stop the sources after this many seconds (live cameras
+                never finish on their own); None = until every source ends.
+
+        Yields:
+            (str, str, ndarray): Source name, "<source>_<sequence>.jpg" and
+            the BGR frame, until every source has finished and its buffer is
+            drained.
+        """
+        deadline = time.monotonic() + duration if duration is not None else None
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                for source in self.sources.values():
+                    source.stopping.set()
+                deadline = None
+
+            yielded = False
+            for name, source in self.sources.items():
+                item = source.buffer.pop() if source.buffer is not None else None
+                if item is not None:
+                    sequence, _, frame = item
+                    yielded = True
+                    yield name, f"{name}_{sequence:06d}.jpg", frame
+
+            if yielded:
+                continue
+            if all(s.finished.is_set() for s in self.sources.values()):
+                if all(s.buffer is None or s.buffer.count == 0 for s in self.sources.values()):
+                    break
+            with self.available:
+                self.available.wait(timeout)
+
+    def stats(self):
+        """Per-source FPS and dropped-frame counters"""
+        return {name: source.stats() for name, source in self.sources.items()}
+
+
+if __name__ == "__main__":
+    service = CaptureService({"cam0": 0}).start()
+    try:
+        for camera, frame_name, frame in service.frames():
+            print(camera, frame_name, frame.shape)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        print(service.stats())
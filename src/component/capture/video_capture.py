@@ -1,7 +1,11 @@
 import cv2
 import os
 import sys
+import time
+import queue
 import datetime
+import threading
+import numpy as np
 from dataclasses import dataclass
 
 
@@ -9,12 +13,18 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")
 
 from src.utils.logger import logging
 from src.utils.exception import CustomException
+from src.utils.metrics import metrics
 
 
 @dataclass
 class VideoRecorderConfig:
     """Configuration for storing recorded videos."""
     stored_path: str = os.path.join("captured_data", "video")
+    queue_size: int = 64            # frames buffered between grabber and encoder
+    fps_probe_frames: int = 15      # frames timed before the writer is opened
+    default_fps: float = 20.0       # used if too few frames arrive to measure
+    late_factor: float = 1.5        # interval > late_factor x median = late frame
+    max_fps: float = 120.0          # clamp for the writer (MP4 timebase limit)
 
 
 class VideoRecorder:
@@ -22,64 +32,147 @@ class VideoRecorder:
         self.videorecordconfig = VideoRecorderConfig()
         os.makedirs(self.videorecordconfig.stored_path, exist_ok=True)
 
+    def _grab(self, cap, frames, stop, duration, stats):
+        """Grabber thread: read frames as fast as the camera delivers them"""
+        start = time.perf_counter()
+        while not stop.is_set() and time.perf_counter() - start < duration:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            timestamp = time.perf_counter()
+            stats["captured"] += 1
+            self._latest_frame = frame
+            try:
+                frames.put_nowait((timestamp, frame))
+            except queue.Full:
+                stats["dropped"] += 1   # encoder is behind; never block the camera
+            metrics.set("attendance_queue_depth", frames.qsize(), queue="recording")
+        stop.set()
+        frames.put(None)
+
+    def _encode(self, frames, file_path, frame_size, stats):
+        """Encoder thread: open the writer at the measured FPS, then write"""
+        config = self.videorecordconfig
+        probe = []
+        item = frames.get()
+        while item is not None and len(probe) < config.fps_probe_frames:
+            probe.append(item)
+            item = frames.get()
+        if item is not None:
+            probe.append(item)
+
+        fps = config.default_fps
+        if len(probe) > 1 and probe[-1][0] > probe[0][0]:
+            fps = (len(probe) - 1) / (probe[-1][0] - probe[0][0])
+        fps = min(max(fps, 1.0), config.max_fps)
+        stats["fps"] = round(fps, 2)
+
+        # Use MP4 codec
+        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+        out = cv2.VideoWriter(file_path, fourcc, fps, frame_size)
+        if not out.isOpened():
+            logging.error(f"Could not open video writer for {file_path} at {fps:.2f} FPS")
+
+        timestamps = []
+        for timestamp, frame in probe:
+            out.write(frame)
+            timestamps.append(timestamp)
+        if item is not None:
+            item = frames.get()
+            while item is not None:
+                out.write(item[1])
+                timestamps.append(item[0])
+                item = frames.get()
+        out.release()
+
+        stats["written"] = len(timestamps)
+        if len(timestamps) > 2:
+            intervals = np.diff(timestamps)
+            median = float(np.median(intervals))
+            stats["late"] = int(np.sum(intervals > config.late_factor * median))
+            stats["measured_fps"] = round((len(timestamps) - 1) / (timestamps[-1] - timestamps[0]), 2)
+
     def initiate_videorecorder(
         self,
         duration: int = 5,
         camera_index: int = 0,
-        show_preview: bool = False,
-    ) -> str:
+        show_preview: bool = True,
+        headless: bool = False,
+        return_stats: bool = False,
+        session_name: str = None,
+    ):
         """
         Records a video from the webcam.
 
+        Frame grabbing and MP4 encoding run on separate threads joined by a
+        bounded queue, so slow encoding or window drawing cannot stall the
+        camera. The output FPS is measured from capture timestamps.
+
         Args:
             duration (int): Recording duration in seconds (default=5).
             camera_index (int): Index of the camera to use (default=0).
             show_preview (bool): If True, show live preview window.
+            headless (bool): If True, make no GUI calls at all.
+            return_stats (bool): If True, also return capture statistics.
+            session_name (str, optional): Suffix of the file name, so rooms
+                recording at the same second get separate files.
 
         Returns:
-            str: Path to the saved video file.
+            str: Path to the saved video file, or (path, stats) when
+            return_stats is True.
         """
         logging.info("Started the recording of the video")
         try:
             cap = cv2.VideoCapture(camera_index)
 
             if not cap.isOpened():
-                raise CustomException("Unable to open the camera")
+                raise IOError(f"Unable to open the camera {camera_index}")
 
             frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 
             # Save as MP4 instead of AVI
-            filename = datetime.datetime.now().strftime("%Y_%m_%d_%H_%M_%S") + ".mp4"
+            filename = datetime.datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+            if session_name:
+                filename = f"{filename}_{session_name}"
+            filename += ".mp4"
             file_path = os.path.join(self.videorecordconfig.stored_path, filename)
-
-            # Use MP4 codec
-            fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-            out = cv2.VideoWriter(
-                file_path,
-                fourcc,
-                20.0,
-                (frame_width, frame_height),
-            )
             logging.info(f"Recording started, saving in {file_path}")
 
-            start_time = datetime.datetime.now()
-            while (datetime.datetime.now() - start_time).seconds < duration:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                out.write(frame)
-
-                # Always show recording window
-                cv2.imshow("Recording", frame)
-                if cv2.waitKey(1) & 0xFF == ord("q"):  # press 'q' to stop early
-                    break
+            stats = {"captured": 0, "written": 0, "dropped": 0, "late": 0,
+                     "fps": 0.0, "measured_fps": 0.0}
+            frames = queue.Queue(maxsize=self.videorecordconfig.queue_size)
+            stop = threading.Event()
+            self._latest_frame = None
 
+            grabber = threading.Thread(
+                target=self._grab, args=(cap, frames, stop, duration, stats), daemon=True
+            )
+            encoder = threading.Thread(
+                target=self._encode, args=(frames, file_path, (frame_width, frame_height), stats),
+                daemon=True,
+            )
+            grabber.start()
+            encoder.start()
+
+            preview = show_preview and not headless
+            while grabber.is_alive():
+                if preview and self._latest_frame is not None:
+                    cv2.imshow("Recording", self._latest_frame)
+                    if cv2.waitKey(1) & 0xFF == ord("q"):  # press 'q' to stop early
+                        stop.set()
+                else:
+                    grabber.join(timeout=0.05)
+
+            grabber.join()
+            encoder.join()
             cap.release()
-            out.release()
-            cv2.destroyAllWindows()
+            if preview:
+                cv2.destroyAllWindows()
 
-            logging.info("Recording finished and saved.")
+            logging.info(f"Recording finished and saved. Stats: {stats}")
+            if return_stats:
+                return file_path, stats
             return file_path
 
         except Exception as e:
@@ -88,5 +181,6 @@ class VideoRecorder:
 
 if __name__ == "__main__":
     vr = VideoRecorder()
-    saved_file = vr.initiate_videorecorder(duration=5, show_preview=True)
+    saved_file, stats = vr.initiate_videorecorder(duration=5, show_preview=True, return_stats=True)
     print("Saved video:", saved_file)
+    print("Capture stats:", stats)
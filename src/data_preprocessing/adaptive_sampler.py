@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+from dataclasses import dataclass
+
+from src.utils.logger import logging
+
+
+@dataclass
+class AdaptiveFrameSamplerConfig:
+    downscale_width: int = 64       # frames are compared as tiny grayscale thumbnails
+    diff_threshold: float = 8.0     # mean absolute gray difference (0-255) = scene change
+    min_interval: int = 2           # never sample more often than every min_interval frames
+    max_interval: int = 30          # always sample at least every max_interval frames
+    faces_sensitivity: float = 0.5  # threshold multiplier while faces are in view
+
+
+class AdaptiveFrameSampler:
+    """
+    Decides which decoded frames are worth running detection on.
+
+    A frame is sampled when its downscaled grayscale thumbnail differs enough
+    from the last sampled one, within the [min_interval, max_interval] rate
+    limits. While the previous sample contained faces the threshold is
+    lowered, so busy scenes are sampled more densely than an empty hall.
+    """
+
+    def __init__(self, config: AdaptiveFrameSamplerConfig = None):
+        self.config = config or AdaptiveFrameSamplerConfig()
+        self.reference = None
+        self.last_sampled = None
+        self.last_face_count = 0
+        self.decoded = 0
+        self.sampled = 0
+        self.recognition_seconds = 0.0
+        self.recognized_frames = 0
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        width = self.config.downscale_width
+        small = cv2.resize(frame, (width, max(1, int(h * width / w))), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.int16)
+
+    def should_sample(self, frame_index, frame):
+        self.decoded += 1
+        if self.last_sampled is not None:
+            since = frame_index - self.last_sampled
+            if since < self.config.min_interval:
+                return False
+
+        thumb = self._thumbnail(frame)
+        take = self.reference is None or frame_index - self.last_sampled >= self.config.max_interval
+        if not take:
+            threshold = self.config.diff_threshold
+            if self.last_face_count > 0:
+                threshold *= self.config.faces_sensitivity
+            take = float(np.mean(np.abs(thumb - self.reference))) >= threshold
+
+        if take:
+            self.reference = thumb
+            self.last_sampled = frame_index
+            self.sampled += 1
+        return take
+
+    def report_faces(self, face_count):
+        """Feedback from recognition: faces found in the latest sampled frame"""
+        self.last_face_count = face_count
+
+    def report_time(self, seconds, frames=1):
+        """Feedback from recognition: time spent on `frames` sampled frames"""
+        self.recognition_seconds += seconds
+        self.recognized_frames += frames
+
+    def stats(self):
+        dropped = self.decoded - self.sampled
+        per_frame = self.recognition_seconds / max(self.recognized_frames, 1)
+        stats = {
+            "decoded": self.decoded,
+            "sampled": self.sampled,
+            "dropped": dropped,
+            "avg_recognition_s": round(per_frame, 4),
+            "estimated_saved_s": round(dropped * per_frame, 2),
+        }
+        logging.info(f"Adaptive sampler stats: {stats}")
+        return stats
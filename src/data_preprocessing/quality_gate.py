@@ -0,0 +1,120 @@
+import cv2
+import json
+import hashlib
+import numpy as np
+from dataclasses import dataclass, asdict
+
+
+# Bump when the checks change in a way the thresholds do not capture
+GATE_VERSION = 2
+
+
+@dataclass
+class QualityGateConfig:
+    min_side: int = 112             # shorter image side in px
+    analysis_width: int = 256       # blur/exposure are measured on a thumbnail this wide
+    min_sharpness: float = 60.0     # variance of the Laplacian on the thumbnail
+    min_brightness: float = 40.0    # mean gray level (0-255) of the face crop
+    max_brightness: float = 220.0
+    max_clipped: float = 0.25       # share of face-crop pixels crushed to black or blown to white
+    exposure_margin: float = 0.2    # face box trimmed by this share per side (hair, background)
+    min_det_score: float = 0.6
+    min_face_size: int = 80         # face box width in px
+    ambiguous_ratio: float = 0.5    # 2nd face at least this big (area vs largest) = multi-face photo
+
+
+class QualityGate:
+    """
+    Cheap checks run before an enrollment image reaches ArcFace.
+
+    Stage 1 works on pixels only: resolution and Laplacian-variance
+    sharpness. Stage 2 runs the face detector alone: it checks the detection
+    score, the face size, whether a second face makes the photo ambiguous,
+    and the exposure of the face crop. Exposure is not measured on the whole
+    image, since enrollment portraits on a white background are mostly
+    blown-out pixels around a well-lit face. Only images that pass both
+    stages are embedded.
+    """
+
+    def __init__(self, config: QualityGateConfig = None):
+        self.config = config or QualityGateConfig()
+
+    def fingerprint(self):
+        """Short id of the gate version and thresholds; cached verdicts are keyed by it"""
+        settings = json.dumps(dict(asdict(self.config), version=GATE_VERSION), sort_keys=True)
+        return hashlib.sha1(settings.encode()).hexdigest()[:8]
+
+    def check_image(self, img):
+        """Pixel-level verdict of an RGB image (a few milliseconds)"""
+        cfg = self.config
+        h, w = img.shape[:2]
+        small = cv2.resize(img, (cfg.analysis_width, max(1, int(h * cfg.analysis_width / w))),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY) if small.ndim == 3 else small
+
+        verdict = {
+            "width": int(w),
+            "height": int(h),
+            "sharpness": round(float(cv2.Laplacian(gray, cv2.CV_64F).var()), 2),
+            "reasons": [],
+        }
+        if min(h, w) < cfg.min_side:
+            verdict["reasons"].append("low_resolution")
+        if verdict["sharpness"] < cfg.min_sharpness:
+            verdict["reasons"].append("blurry")
+        verdict["ok"] = not verdict["reasons"]
+        return verdict
+
+    def check_exposure(self, verdict, img, bbox):
+        """Brightness and clipping of the inner face crop, added to a verdict"""
+        cfg = self.config
+        h, w = img.shape[:2]
+        mx = cfg.exposure_margin * (bbox[2] - bbox[0])
+        my = cfg.exposure_margin * (bbox[3] - bbox[1])
+        x1, y1 = max(int(bbox[0] + mx), 0), max(int(bbox[1] + my), 0)
+        x2, y2 = min(int(bbox[2] - mx), w), min(int(bbox[3] - my), h)
+        crop = img[y1:y2, x1:x2]
+        if crop.size == 0:
+            return
+        gray = cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY) if crop.ndim == 3 else crop
+
+        verdict["brightness"] = round(float(gray.mean()), 2)
+        verdict["clipped"] = round(float(np.mean((gray <= 5) | (gray >= 250))), 4)
+        if verdict["brightness"] < cfg.min_brightness:
+            verdict["reasons"].append("underexposed")
+        elif verdict["brightness"] > cfg.max_brightness:
+            verdict["reasons"].append("overexposed")
+        if verdict["clipped"] > cfg.max_clipped:
+            verdict["reasons"].append("clipped_exposure")
+
+    def check_faces(self, verdict, bboxes, img=None):
+        """
+        Detector-level checks, added to a stage-1 verdict. With img, the
+        exposure of the chosen face crop is checked as well.
+
+        Returns:
+            int: Index of the face to embed, or None if the image is rejected.
+        """
+        cfg = self.config
+        verdict["faces"] = int(len(bboxes))
+        if len(bboxes) == 0:
+            verdict["reasons"].append("no_face")
+            verdict["ok"] = False
+            return None
+
+        areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+        order = np.argsort(-areas)
+        best = int(order[0])
+        verdict["det_score"] = round(float(bboxes[best, 4]), 4)
+        verdict["face_size"] = int(bboxes[best, 2] - bboxes[best, 0])
+
+        if verdict["det_score"] < cfg.min_det_score:
+            verdict["reasons"].append("low_det_score")
+        if verdict["face_size"] < cfg.min_face_size:
+            verdict["reasons"].append("small_face")
+        if len(order) > 1 and areas[order[1]] >= cfg.ambiguous_ratio * areas[best]:
+            verdict["reasons"].append("multiple_faces")
+        if img is not None:
+            self.check_exposure(verdict, img, bboxes[best])
+        verdict["ok"] = not verdict["reasons"]
+        return best if verdict["ok"] else None
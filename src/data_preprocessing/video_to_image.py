@@ -8,39 +8,69 @@ from src.utils.exception import CustomException
 class VideoToImage:
 
     @staticmethod
-    def video_to_frames(video_path, frame_skip=1):
+    def iter_frames(video_path, frame_skip=1, save_dir=None, sampler=None):
         """
-        Convert a video into frames (images) and save in raw_frames/<video_name>/.
+        Decode a video and yield every frame_skip-th frame as a numpy array.
+
+        Args:
+            video_path (str): Path of the video file.
+            frame_skip (int): Keep one frame out of every frame_skip.
+            save_dir (str, optional): If given, kept frames are also written
+                there as JPEGs (side sink); otherwise nothing touches disk.
+            sampler (AdaptiveFrameSampler, optional): Decides which frames to
+                keep instead of the fixed frame_skip.
+
+        Yields:
+            (str, ndarray): Frame name (frame_00000.jpg, ...) and BGR frame.
         """
-        try:
-            # Get video name without extension
-            video_name = os.path.splitext(os.path.basename(video_path))[0]
-
-            
-            output_dir = os.path.join("raw_frames", video_name)
-            os.makedirs(output_dir, exist_ok=True)
-
-            # Open video
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                raise CustomException(f"Cannot open video file: {video_path}", sys.exc_info())
+        if save_dir is not None:
+            os.makedirs(save_dir, exist_ok=True)
 
-            frame_count = 0
-            saved_count = 0
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise IOError(f"Cannot open video file: {video_path}")
 
+        frame_count = 0
+        saved_count = 0
+        try:
             while True:
                 ret, frame = cap.read()
                 if not ret:
                     break
 
-                if frame_count % frame_skip == 0:
-                    img_name = os.path.join(output_dir, f"frame_{saved_count:05d}.jpg")
-                    cv2.imwrite(img_name, frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
+                if sampler is not None:
+                    keep = sampler.should_sample(frame_count, frame)
+                else:
+                    keep = frame_count % frame_skip == 0
+
+                if keep:
+                    img_name = f"frame_{saved_count:05d}.jpg"
+                    if save_dir is not None:
+                        cv2.imwrite(os.path.join(save_dir, img_name), frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
                     saved_count += 1
+                    yield img_name, frame
 
                 frame_count += 1
-
+        finally:
             cap.release()
+            logging.info(f"Decoded {frame_count} frames from '{video_path}', kept {saved_count}")
+
+    @staticmethod
+    def video_to_frames(video_path, frame_skip=1):
+        """
+        Convert a video into frames (images) and save in raw_frames/<video_name>/.
+        """
+        try:
+            # Get video name without extension
+            video_name = os.path.splitext(os.path.basename(video_path))[0]
+
+            
+            output_dir = os.path.join("raw_frames", video_name)
+
+            saved_count = 0
+            for _ in VideoToImage.iter_frames(video_path, frame_skip, save_dir=output_dir):
+                saved_count += 1
+
             logging.info(f"Done! Extracted {saved_count} frames to '{output_dir}'")
             return output_dir  # return the folder path
 
@@ -0,0 +1,101 @@
+import sys
+import numpy as np
+from dataclasses import dataclass
+from insightface.utils import face_align
+
+from src.model.gallery import l2_normalize
+from src.utils.exception import CustomException
+from src.utils.metrics import metrics
+
+
+@dataclass
+class BatchRecognitionEngineConfig:
+    frame_batch_size: int = 8       # frames detected together before embedding
+    embed_batch_size: int = 32      # aligned crops per ArcFace ONNX call
+    det_max_num: int = 0            # 0 = keep every detected face
+
+
+@dataclass
+class DetectedFace:
+    frame_index: int                # index of the frame inside the batch
+    bbox: np.ndarray                # x1, y1, x2, y2
+    det_score: float
+    kps: np.ndarray                 # 5 landmarks used for alignment
+    normed_embedding: np.ndarray = None
+
+
+class BatchRecognitionEngine:
+    """
+    Detection over a batch of frames followed by one batched ArcFace call for
+    all face crops of the batch, instead of one recognition run per face as
+    FaceAnalysis.get does.
+    """
+
+    def __init__(self, app, config: BatchRecognitionEngineConfig = None):
+        self.config = config or BatchRecognitionEngineConfig()
+        self.det_model = app.det_model
+        self.rec_model = app.models["recognition"]
+
+    def detect(self, frames, detector=None, start_index=0):
+        """
+        Args:
+            detector: Optional stand-in for the detector (e.g. a per-camera
+                MultiScaleDetector); defaults to the full-frame det_model.
+            start_index: frame_index of the first frame, for frames that are
+                detected one at a time but embedded as one batch.
+
+        Returns:
+            list: One list of DetectedFace (without embeddings) per frame.
+        """
+        detector = detector or self.det_model
+        metrics.inc("attendance_frames_total", len(frames))
+        detections = []
+        with metrics.span("detect"):
+            for frame_index, frame in enumerate(frames):
+                bboxes, kpss = detector.detect(frame, max_num=self.config.det_max_num)
+                faces = []
+                for i in range(bboxes.shape[0]):
+                    faces.append(DetectedFace(
+                        frame_index=start_index + frame_index,
+                        bbox=bboxes[i, :4],
+                        det_score=float(bboxes[i, 4]),
+                        kps=kpss[i] if kpss is not None else None,
+                    ))
+                detections.append(faces)
+        return detections
+
+    def embed(self, frames, faces):
+        """Align every face crop and embed them in chunks of embed_batch_size"""
+        faces = [face for face in faces if face.kps is not None]
+        if not faces:
+            return faces
+
+        with metrics.span("embed"):
+            crops = [
+                face_align.norm_crop(frames[face.frame_index], landmark=face.kps,
+                                     image_size=self.rec_model.input_size[0])
+                for face in faces
+            ]
+
+            step = self.config.embed_batch_size
+            for start in range(0, len(crops), step):
+                feats = self.rec_model.get_feat(crops[start:start + step])
+                feats = l2_normalize(np.asarray(feats).reshape(len(crops[start:start + step]), -1))
+                for face, feat in zip(faces[start:start + step], feats):
+                    face.normed_embedding = feat
+        return faces
+
+    def process(self, frames, detector=None):
+        """
+        Detect and embed all faces of a batch of frames.
+
+        Returns:
+            list: One list of DetectedFace (with normed_embedding) per frame.
+        """
+        try:
+            detections = self.detect(frames, detector)
+            self.embed(frames, [face for faces in detections for face in faces])
+            return [[face for face in faces if face.normed_embedding is not None]
+                    for faces in detections]
+        except Exception as e:
+            raise CustomException(e, sys)
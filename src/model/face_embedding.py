@@ -1,10 +1,16 @@
 import os
 import sys
+import cv2
+import json
+import hashlib
 import numpy as np
-import insightface
 from PIL import Image
 from dataclasses import dataclass
 
+from src.model.gallery_store import GalleryStore
+from src.model.model_registry import get_face_analysis
+from src.model.batch_engine import BatchRecognitionEngine, DetectedFace
+from src.data_preprocessing.quality_gate import QualityGate
 from src.utils.exception import CustomException
 from src.utils.logger import logging
 
@@ -13,81 +19,289 @@ from src.utils.logger import logging
 class FaecEmbeddingConfig:
     train_path: str = os.path.join("data", "students")
     val_path: str = os.path.join("data", "students")
-    output_path: str = os.path.join("C:/ht/embeddings")  
+    output_path: str = os.path.join("C:/ht/embeddings")
+    cache_name: str = "embedding_cache.npz"
+    verdicts_name: str = "quality_verdicts.json"
+    quality_gate: bool = True       # reject blurry/dark/tiny/multi-face images before ArcFace
 
 
 class FaecEmbedding:
     def __init__(self):
         self.config = FaecEmbeddingConfig()
         os.makedirs(self.config.output_path, exist_ok=True)
+        self.gallery_store = GalleryStore(self.config.output_path)
+        self.quality_gate = QualityGate()
+        self.app = None
+        self.engine = None
 
-    def initae_faec_embedding(self):
-        logging.info("Face embedding started")
+    def load_model(self):
+        """Get the shared ArcFace model (loaded once per process)"""
+        if self.app is None:
+            self.app = get_face_analysis(root='C:/ht/models', det_size=(640, 640))
+        return self.app
+
+    def get_engine(self):
+        if self.engine is None:
+            self.engine = BatchRecognitionEngine(self.load_model())
+        return self.engine
+
+    # Extract embedding from a single image
+    def get_embedding(self, image_path):
+        return self.embed_image(self.load_image(image_path))[0]
+
+    @staticmethod
+    def load_image(image_path):
+        return np.array(Image.open(image_path).convert("RGB"))
+
+    @staticmethod
+    def decode_image(data):
+        """Decode uploaded bytes to an RGB array (same layout as the PIL path), None if unreadable"""
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            return None
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+    def embed_image(self, img):
+        """
+        Quality-gate an RGB image and embed its face only if it passes.
+
+        Returns:
+            (embedding, verdict): embedding is None for rejected images; the
+            verdict holds the measurements and rejection reasons.
+        """
+        if not self.config.quality_gate:
+            embedding = self.get_embedding_from_array(img)
+            return embedding, {"ok": embedding is not None, "reasons": [] if embedding is not None else ["no_face"]}
+
+        # Stage 1: pixels only, no model
+        verdict = self.quality_gate.check_image(img)
+        if not verdict["ok"]:
+            return None, verdict
+
+        # Stage 2: detector only
+        bboxes, kpss = self.load_model().det_model.detect(img, max_num=0)
+        best = self.quality_gate.check_faces(verdict, bboxes, img)
+        if best is None or kpss is None:
+            return None, verdict
+
+        # Stage 3: ArcFace on the one accepted face
+        face = DetectedFace(0, bboxes[best, :4], float(bboxes[best, 4]), kpss[best])
+        self.get_engine().embed([img], [face])
+        return face.normed_embedding, verdict
+
+    def get_embedding_from_array(self, img):
+        faces = self.load_model().get(img=img)
+
+        if len(faces) == 0:
+            return None
+
+        faces = sorted(faces, key=lambda x: x.bbox[2] - x.bbox[0], reverse=True)
+        embedding = faces[0].normed_embedding  # 512-D vector
+        return embedding
+
+    def cache_key(self, data):
+        """
+        Content hash plus the quality gate fingerprint: changing the gate's
+        thresholds re-evaluates images instead of reusing old rejections.
+        """
+        gate = self.quality_gate.fingerprint() if self.config.quality_gate else "nogate"
+        return f"{hashlib.sha1(data).hexdigest()}-{gate}"
+
+    def file_hash(self, image_path):
+        with open(image_path, "rb") as f:
+            return self.cache_key(f.read())
+
+    def load_cache(self, person_dir):
+        """Content-hash cache: {cache_key: embedding or None (no face found / rejected)}"""
+        cache_path = os.path.join(person_dir, self.config.cache_name)
+        if not os.path.exists(cache_path):
+            return {}
+        data = np.load(cache_path, allow_pickle=False)
+        cache = dict(zip(data["hashes"].tolist(), data["embeddings"]))
+        cache.update({h: None for h in data["no_face"].tolist()})
+        return cache
+
+    def load_verdicts(self, person_dir):
+        """Persisted quality verdicts: {cache_key: verdict}"""
+        path = os.path.join(person_dir, self.config.verdicts_name)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_verdicts(self, person_dir, verdicts):
+        with open(os.path.join(person_dir, self.config.verdicts_name), "w") as f:
+            json.dump(verdicts, f, indent=2)
+
+    def save_cache(self, person_dir, cache):
+        hashes = [h for h, e in cache.items() if e is not None]
+        embeddings = np.array([cache[h] for h in hashes], dtype=np.float32).reshape(len(hashes), -1) \
+            if hashes else np.zeros((0, 512), dtype=np.float32)
+        no_face = [h for h, e in cache.items() if e is None]
+        np.savez(
+            os.path.join(person_dir, self.config.cache_name),
+            hashes=np.array(hashes, dtype=str),
+            embeddings=embeddings,
+            no_face=np.array(no_face, dtype=str),
+        )
+
+    # Process all images, skipping the ones already embedded
+    def folder_to_embeddings(self, person_name, folder_path):
+        person_dir = os.path.join(self.config.output_path, person_name)
+        os.makedirs(person_dir, exist_ok=True)
+
+        cache = self.load_cache(person_dir)
+        verdicts = self.load_verdicts(person_dir)
+        current = {}
+        current_verdicts = {}
+        reused = 0
+        for file in sorted(os.listdir(folder_path)):
+            if file.lower().endswith(('.jpg', '.jpeg', '.png')):
+                digest = self.file_hash(os.path.join(folder_path, file))
+                if digest in cache:
+                    emd = cache[digest]
+                    reused += 1
+                else:
+                    emd, verdicts[digest] = self.embed_image(self.load_image(os.path.join(folder_path, file)))
+                    verdicts[digest]["file"] = file
+                current[digest] = emd
+                if digest in verdicts:
+                    current_verdicts[digest] = verdicts[digest]
+
+        # Only the images still in the folder stay in the cache
+        self.save_cache(person_dir, current)
+        self.save_verdicts(person_dir, current_verdicts)
+        rejected = sum(1 for e in current.values() if e is None)
+        logging.info(f"{person_name}: {len(current)} images, {reused} reused from cache, {rejected} rejected")
+
+        return self.save_person_embeddings(person_dir, current)
+
+    # Process the data set
+    def dataset_to_embeddings(self, dataset_path):
+        people_embeddings = {}
+        for person in os.listdir(dataset_path):
+            person_folder = os.path.join(dataset_path, person)
+            if os.path.isdir(person_folder):
+                all_vecs, mean_vec = self.folder_to_embeddings(person, person_folder)
+                if mean_vec is not None:
+                    people_embeddings[person] = {
+                        "all_embeddings": all_vecs,
+                        "mean_embedding": mean_vec
+                    }
+        return people_embeddings
+
+    def save_person_embeddings(self, person_dir, cache):
+        """Write all_embeddings.npy / mean_embedding.npy from a person's cache"""
+        embeddings = np.array([e for e in cache.values() if e is not None])
+        if len(embeddings) == 0:
+            return None, None
+        mean_embedding = np.mean(embeddings, axis=0)
+        np.save(os.path.join(person_dir, "all_embeddings.npy"), embeddings)
+        np.save(os.path.join(person_dir, "mean_embedding.npy"), mean_embedding)
+        return embeddings, mean_embedding
+
+    def enroll_images(self, usn, images, append=False):
+        """
+        Enroll uploaded images straight from memory: decode with cv2.imdecode,
+        embed, and update the student's cache and gallery entry without
+        writing and re-reading the files.
+
+        Args:
+            usn (str): Student USN.
+            images (list): (file_name, bytes) pairs.
+            append (bool): Add the images to the student's enrolled set
+                instead of replacing the set with them. Images already
+                embedded before are reused from the cache either way.
+
+        Returns:
+            list: Per-image results {"file", "face_found", "cached"}.
+        """
+        logging.info(f"In-memory enrollment started for {usn} with {len(images)} images"
+                     f" ({'append' if append else 'replace'})")
         try:
-            # Initialize ArcFace model
-            app = insightface.app.FaceAnalysis(
-                name='buffalo_l',
-                root='C:/ht/models',
-                providers=['CPUExecutionProvider']
-            )
-            app.prepare(ctx_id=0)
-
-            # Extract embedding from a single image
-            def get_embedding(image_path):
-                img = np.array(Image.open(image_path).convert("RGB"))
-                faces = app.get(img=img)
-
-                if len(faces) == 0:
-                    return None
-
-                
-                faces = sorted(faces, key=lambda x: x.bbox[2] - x.bbox[0], reverse=True)
-                embedding = faces[0].normed_embedding  # 512-D vector
-                return embedding
-
-            # Process all images
-            def folder_to_embeddings(person_name, folder_path):
-                embeddings = []
-                for file in os.listdir(folder_path):
-                    if file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                        emd = get_embedding(os.path.join(folder_path, file))
-                        if emd is not None:
-                            embeddings.append(emd)
-
-                embeddings = np.array(embeddings)
-                if len(embeddings) > 0:
-                    mean_embedding = np.mean(embeddings, axis=0)
-
-                    
-                    person_dir = os.path.join(self.config.output_path, person_name)
-                    os.makedirs(person_dir, exist_ok=True)
-
-                    np.save(os.path.join(person_dir, "all_embeddings.npy"), embeddings)
-                    np.save(os.path.join(person_dir, "mean_embedding.npy"), mean_embedding)
-
-                    return embeddings, mean_embedding
+            person_dir = os.path.join(self.config.output_path, usn)
+            os.makedirs(person_dir, exist_ok=True)
+            cache = self.load_cache(person_dir)
+            verdicts = self.load_verdicts(person_dir)
+            current = dict(cache) if append else {}
+            current_verdicts = dict(verdicts) if append else {}
+
+            results = []
+            for file_name, data in images:
+                digest = self.cache_key(data)
+                cached = digest in cache
+                if cached:
+                    current[digest] = cache[digest]
+                    if digest in verdicts:
+                        current_verdicts[digest] = verdicts[digest]
                 else:
-                    return None, None
-
-            # Process the data set
-            def dataset_to_embeddings(dataset_path):
-                people_embeddings = {}
-                for person in os.listdir(dataset_path):
-                    person_folder = os.path.join(dataset_path, person)
-                    if os.path.isdir(person_folder):
-                        all_vecs, mean_vec = folder_to_embeddings(person, person_folder)
-                        if mean_vec is not None:
-                            people_embeddings[person] = {
-                                "all_embeddings": all_vecs,
-                                "mean_embedding": mean_vec
-                            }
-                return people_embeddings
+                    # Same bytes judged by an older gate: replace, never count twice
+                    content = digest.split("-")[0]
+                    for stale in [k for k in current if k.split("-")[0] == content]:
+                        current.pop(stale)
+                        current_verdicts.pop(stale, None)
+                    img = self.decode_image(data)
+                    if img is None:
+                        current[digest], current_verdicts[digest] = None, {"ok": False, "reasons": ["unreadable"]}
+                    else:
+                        current[digest], current_verdicts[digest] = self.embed_image(img)
+                    current_verdicts[digest]["file"] = file_name
+                results.append({
+                    "file": file_name,
+                    "face_found": current[digest] is not None,
+                    "cached": cached,
+                    "rejected": current_verdicts.get(digest, {}).get("reasons", []),
+                })
+
+            if all(e is None for e in current.values()):
+                # Nothing usable: keep the enrolled set rather than emptying it
+                logging.info(f"No face found in any image for {usn}")
+                return results
+
+            self.save_cache(person_dir, current)
+            self.save_verdicts(person_dir, current_verdicts)
+            all_vecs, mean_vec = self.save_person_embeddings(person_dir, current)
+            version = self.gallery_store.upsert(usn, mean_vec, all_vecs)
+            logging.info(f"Enrolled {usn} with {len(all_vecs)} embeddings, gallery {version}")
+            return results
+
+        except Exception as e:
+            raise CustomException(e, sys)
 
+    def enroll_student(self, usn, folder_path):
+        """
+        Embed only one student's folder and update that student's entry in the
+        packed gallery, instead of re-embedding the whole dataset.
+
+        Returns:
+            int: Number of embeddings stored for the student.
+        """
+        logging.info(f"Incremental enrollment started for {usn}")
+        try:
+            all_vecs, mean_vec = self.folder_to_embeddings(usn, folder_path)
+            if mean_vec is None:
+                logging.info(f"No face found in any image for {usn}")
+                return 0
+
+            version = self.gallery_store.upsert(usn, mean_vec, all_vecs)
+            logging.info(f"Enrolled {usn} with {len(all_vecs)} embeddings, gallery {version}")
+            return len(all_vecs)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def initae_faec_embedding(self):
+        logging.info("Face embedding started")
+        try:
             # Run on training dataset
             dataset_path = self.config.train_path
-            people_embeddings = dataset_to_embeddings(dataset_path)
+            people_embeddings = self.dataset_to_embeddings(dataset_path)
             logging.info("face embedding is done")
 
+            # Publish the consolidated gallery the recognizer memory-maps
+            version = self.gallery_store.rebuild_from_folders()
+            print(f"Published packed gallery version: {version}")
+
             # Print results
             for person, data in people_embeddings.items():
                 print(f"\nPerson: {person}")
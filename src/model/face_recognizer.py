@@ -1,13 +1,23 @@
 import os
 import cv2
+import time
+import threading
 import numpy as np
-import insightface
-from numpy.linalg import norm
 from dataclasses import dataclass
 
 from src.utils.logger import logging
 from src.utils.exception import CustomException
-from insightface.app import FaceAnalysis
+from src.utils.annotation_writer import AnnotationWriter
+from src.utils.metrics import metrics
+from src.model.gallery import FaceGallery
+from src.model.ann_index import PrototypeIndex, IVFIndexConfig
+from src.model.gallery_store import GalleryStore
+from src.model.model_registry import get_face_analysis
+from src.model.batch_engine import BatchRecognitionEngine, BatchRecognitionEngineConfig
+from src.model.multiscale_detector import MultiScaleDetector, MultiScaleDetectorConfig
+from src.model.parallel_recognizer import ParallelFrameRecognizer
+from src.model.face_tracker import FaceTracker, FaceTrackerConfig
+from src.model.recognition_result import RecognitionResultBuilder
 
 
 # Path to embeddings (already created)
@@ -19,32 +29,262 @@ THRESHOLD = 0.5   # similarity threshold
 @dataclass
 class FaceRecognizerConfig:
     captured_data_path: str = r"C:\ht\raw_frames\2025_09_18_12_34_22"
+    match_mode: str = "mean"        # "mean" = one embedding per person, "ann" = all prototypes (see PrototypeIndex)
+    ann_neighbors: int = 10         # prototypes retrieved per face in "ann" mode
+    ann_votes_per_identity: int = 3
+    ann_n_probe: int = 8
+    use_packed_gallery: bool = True     # open gallery.json + mmap'd matrix when published
+    use_batch_engine: bool = True       # batched detection + ArcFace instead of app.get per frame
+    frame_batch_size: int = 8
+    embed_batch_size: int = 32
+    intra_op_threads: int = 0           # 0 = ONNX Runtime default
+    inter_op_threads: int = 0
+    num_workers: int = 0                # > 0 shards frames across worker processes
+    threads_per_worker: int = 1
+    annotation_mode: str = "full"       # "off", "sampled" or "full"
+    annotation_every_n: int = 10        # "sampled": annotate every Nth frame ...
+    annotate_unknowns: bool = True      # ... and every frame with an Unknown face
+    annotation_queue_size: int = 64
+    track_reverify_every: int = 15      # tracking: re-embed a live track every N frames
+    detection_mode: str = "full"        # "full" = one 640x640 pass, "multiscale" = coarse pass + tiles
+    multiscale: MultiScaleDetectorConfig = None     # default for cameras without their own
+    camera_detection: dict = None       # camera -> MultiScaleDetectorConfig
+    gallery_watch_seconds: float = 0    # > 0 polls the embeddings store and hot-swaps the gallery
+
+
+class TrackingStream:
+    """
+    Tracking state of one camera inside FaceRecognizer.track_cameras().
+
+    Detection and tracking run per frame, so the sampler hears about faces
+    before it decides on the next frame; embedding is batched in flush().
+    """
+
+    def __init__(self, recognizer, engine, camera=None, tracker_config: FaceTrackerConfig = None,
+                 sampler=None):
+        self.recognizer = recognizer
+        self.engine = engine
+        self.detector = recognizer.get_detector(camera)
+        self.tracker = FaceTracker(tracker_config or FaceTrackerConfig(
+            reverify_every=recognizer.facerecognizeconfig.track_reverify_every
+        ))
+        self.sampler = sampler
+        self.frame_index = 0
+        self.batch, self.to_embed, self.owners = [], [], []
+        self.compute = 0.0  # detect/embed/match only; pulling a frame also decodes it
+
+    def add(self, img_name, frame):
+        started = time.perf_counter()
+        faces = self.engine.detect([frame], self.detector, start_index=len(self.batch))[0]
+        tracks, needs_embedding = self.tracker.update(self.frame_index, [face.bbox for face in faces])
+        for face, track, needed in zip(faces, tracks, needs_embedding):
+            if needed:
+                track.last_embedded = self.frame_index
+                self.to_embed.append(face)
+                self.owners.append(track)
+        self.compute += time.perf_counter() - started
+        if self.sampler is not None:
+            self.sampler.report_faces(len(faces))
+        self.batch.append((img_name, frame, tracks))
+        self.frame_index += 1
+
+    def flush(self):
+        """Embed the pending faces and vote them into their tracks; returns [(frame_name, tracks)]"""
+        if not self.batch:
+            return []
+        started = time.perf_counter()
+        frames = [frame for _, frame, _ in self.batch]
+        embedded = self.engine.embed(frames, self.to_embed)
+        embedded_ids = {id(face) for face in embedded}
+        owners = [t for face, t in zip(self.to_embed, self.owners) if id(face) in embedded_ids]
+        matches = self.recognizer.recognize_faces([face.normed_embedding for face in embedded])
+        for track, face_matches in zip(owners, matches):
+            track.add_vote(*face_matches[0])
+        if self.sampler is not None:
+            self.sampler.report_time(self.compute + time.perf_counter() - started, len(frames))
+
+        flushed = [(img_name, tracks) for img_name, _, tracks in self.batch]
+        self.batch, self.to_embed, self.owners = [], [], []
+        self.compute = 0.0
+        return flushed
+
+    def stats(self):
+        return dict(self.tracker.stats(), frames=self.frame_index)
 
 
 class FaceRecognizer:
-    def __init__(self):
-        self.facerecognizeconfig = FaceRecognizerConfig()
+    def __init__(self, config: FaceRecognizerConfig = None, app=None, load_gallery=True):
+        """
+        app: Optional prepared FaceAnalysis-like object (e.g. benchmark stubs)
+            used instead of the shared buffalo_l models.
+        load_gallery: False leaves the gallery empty until set_gallery().
+        """
+        self.facerecognizeconfig = config or FaceRecognizerConfig()
 
-        # Load ArcFace + RetinaFace
-        self.app = insightface.app.FaceAnalysis(
-            name="buffalo_l",
-            root=MODEL_PATH,
-            providers=["CPUExecutionProvider"]
-        )
-        self.app.prepare(ctx_id=0, det_size=(640, 640))
+        # Load ArcFace + RetinaFace (shared across the process)
+        self.app = app or self.load_model()
+        self.engine = self.build_engine()
+        self.pool = None
+        self.detectors = {}
+        self.gallery_version = None
+        self.gallery_watcher = None
+        self.gallery_watch_stop = threading.Event()
 
         # Load embeddings from disk
-        self.known_embeddings = self.load_embeddings()
+        self.gallery_store = GalleryStore(EMBEDDINGS_PATH)
+        if load_gallery:
+            self.load_gallery()
+            if self.facerecognizeconfig.gallery_watch_seconds > 0:
+                self.start_gallery_watcher()
+        else:
+            self.set_gallery(FaceGallery([], np.zeros((0, 512), dtype=np.float32)))
 
     def intiatefaceregonizer(self):
         """Reinitialize the model if needed"""
-        self.app = insightface.app.FaceAnalysis(
-            name="buffalo_l",
+        self.app = self.load_model()
+        self.engine = self.build_engine()
+        self.load_gallery()
+
+    def load_model(self):
+        return get_face_analysis(
             root=MODEL_PATH,
-            providers=["CPUExecutionProvider"]
+            det_size=(640, 640),
+            intra_op_threads=self.facerecognizeconfig.intra_op_threads,
+            inter_op_threads=self.facerecognizeconfig.inter_op_threads,
         )
-        self.app.prepare(ctx_id=0, det_size=(640, 640))
-        self.known_embeddings = self.load_embeddings()
+
+    def build_engine(self):
+        if not self.facerecognizeconfig.use_batch_engine:
+            return None
+        return BatchRecognitionEngine(self.app, BatchRecognitionEngineConfig(
+            frame_batch_size=self.facerecognizeconfig.frame_batch_size,
+            embed_batch_size=self.facerecognizeconfig.embed_batch_size,
+        ))
+
+    def set_camera_detection(self, camera, config: MultiScaleDetectorConfig):
+        """Multi-scale detection settings of one camera (replaces its detector state)"""
+        if self.facerecognizeconfig.camera_detection is None:
+            self.facerecognizeconfig.camera_detection = {}
+        self.facerecognizeconfig.camera_detection[camera] = config
+        self.detectors.pop(camera, None)
+
+    def get_detector(self, camera=None):
+        """
+        Per-camera MultiScaleDetector in "multiscale" mode, None (plain
+        full-frame detection) otherwise.
+        """
+        if self.facerecognizeconfig.detection_mode != "multiscale":
+            return None
+        if camera not in self.detectors:
+            per_camera = self.facerecognizeconfig.camera_detection or {}
+            config = per_camera.get(camera) or self.facerecognizeconfig.multiscale
+            self.detectors[camera] = MultiScaleDetector(self.app.det_model, config)
+        return self.detectors[camera]
+
+    def start_session(self, camera=None):
+        """Reset the camera's multi-scale detector so the session begins with a full tile scan"""
+        detector = self.detectors.get(camera)
+        if detector is not None:
+            detector.reset()
+
+    def load_gallery(self):
+        """
+        Load the gallery, preferring the packed artifact (one manifest read and
+        memory-mapped matrices) over one np.load per student folder.
+        """
+        version = self.gallery_stamp()
+        gallery, prototype_index = self.build_gallery()
+        self.set_gallery(gallery, prototype_index)
+        self.gallery_version = version
+
+    def build_gallery(self):
+        """Read the embeddings store into a new (gallery, prototype_index) pair"""
+        packed = None
+        if self.facerecognizeconfig.use_packed_gallery:
+            packed = self.gallery_store.load(mmap=True)
+
+        if packed is not None:
+            gallery = FaceGallery(packed.names, packed.means, normalized=True)
+            logging.info(f"Loaded packed gallery {packed.version} with {len(packed.names)} persons")
+        else:
+            gallery = FaceGallery.from_embeddings(self.load_embeddings())
+
+        return gallery, self.build_prototype_index(packed)
+
+    def gallery_stamp(self):
+        """
+        Cheap change marker of the embeddings store: the packed manifest
+        version, or the newest embedding mtime when reading folders.
+        """
+        if self.facerecognizeconfig.use_packed_gallery:
+            version = self.gallery_store.version()
+            if version is not None:
+                return version
+
+        count, newest = 0, 0
+        if os.path.isdir(EMBEDDINGS_PATH):
+            for person in os.scandir(EMBEDDINGS_PATH):
+                if not person.is_dir():
+                    continue
+                for file_name in ("mean_embedding.npy", "all_embeddings.npy"):
+                    try:
+                        newest = max(newest, os.stat(os.path.join(person.path, file_name)).st_mtime_ns)
+                        count += 1
+                    except OSError:
+                        pass
+        return f"folders:{count}:{newest}"
+
+    def refresh_gallery_if_changed(self):
+        """
+        Rebuild the gallery when the store changed and swap it in; frames
+        being matched keep the old one. Models are not touched.
+
+        Returns:
+            bool: True if a new gallery was swapped in.
+        """
+        version = self.gallery_stamp()
+        if version == self.gallery_version:
+            return False
+        gallery, prototype_index = self.build_gallery()
+        self.set_gallery(gallery, prototype_index)
+        self.gallery_version = version
+        metrics.inc("attendance_gallery_reloads_total")
+        logging.info(f"Gallery reloaded ({version}): {len(gallery)} persons")
+        return True
+
+    def start_gallery_watcher(self, interval=None):
+        """Poll the embeddings store on a background thread"""
+        if self.gallery_watcher is not None:
+            return
+        interval = interval or self.facerecognizeconfig.gallery_watch_seconds
+        self.gallery_watch_stop.clear()
+
+        def watch():
+            while not self.gallery_watch_stop.wait(interval):
+                try:
+                    self.refresh_gallery_if_changed()
+                except Exception as e:
+                    # A half-written store is picked up on the next poll
+                    logging.error(f"Gallery reload failed: {e}")
+
+        self.gallery_watcher = threading.Thread(target=watch, name="gallery-watcher", daemon=True)
+        self.gallery_watcher.start()
+
+    def stop_gallery_watcher(self):
+        if self.gallery_watcher is not None:
+            self.gallery_watch_stop.set()
+            self.gallery_watcher.join()
+            self.gallery_watcher = None
+
+    def set_gallery(self, gallery: FaceGallery, prototype_index: PrototypeIndex = None):
+        """
+        Match against an in-memory gallery (and optional prototype index).
+        The pair is swapped in one assignment, so a concurrent match never
+        sees a gallery with another gallery's prototype index.
+        """
+        self.known_embeddings = dict(zip(gallery.names, gallery.matrix))
+        self.matchers = (gallery, prototype_index)
+        self.gallery, self.prototype_index = self.matchers
 
     def load_embeddings(self):
         """Load stored mean embeddings for each person"""
@@ -60,28 +300,70 @@ class FaceRecognizer:
         logging.info(f"Loaded embeddings for persons: {list(people_embeddings.keys())}")
         return people_embeddings
 
+    def load_all_embeddings(self):
+        """Load every stored embedding (all_embeddings.npy) for each person"""
+        people_embeddings = {}
+        for person in os.listdir(EMBEDDINGS_PATH):
+            all_path = os.path.join(EMBEDDINGS_PATH, person, "all_embeddings.npy")
+            if os.path.exists(all_path):
+                people_embeddings[person] = np.load(all_path)
+        logging.info(f"Loaded all prototypes for {len(people_embeddings)} persons")
+        return people_embeddings
+
+    def build_prototype_index(self, packed=None):
+        """Index all stored prototypes when running in "ann" match mode"""
+        if self.facerecognizeconfig.match_mode != "ann":
+            return None
+        options = dict(
+            neighbors=self.facerecognizeconfig.ann_neighbors,
+            votes_per_identity=self.facerecognizeconfig.ann_votes_per_identity,
+            config=IVFIndexConfig(n_probe=self.facerecognizeconfig.ann_n_probe),
+        )
+        if packed is not None:
+            return PrototypeIndex(packed.names, packed.all_labels, packed.all_vectors, **options)
+        return PrototypeIndex.from_embeddings(self.load_all_embeddings(), **options)
+
     def recognize_face(self, face_embedding):
         """Compare face embedding with known embeddings"""
-        logging.info("Start face recognition for detected embedding")
-        best_match = "Unknown"
-        best_score = -1
+        return self.recognize_faces([face_embedding])[0][0]
 
-        for person, saved_embedding in self.known_embeddings.items():
-            sim = np.dot(face_embedding, saved_embedding) / (norm(face_embedding) * norm(saved_embedding))
-            if sim > best_score:
-                best_score = sim
-                best_match = person
+    def recognize_faces(self, face_embeddings, top_k=1):
+        """
+        Match all faces of a frame against the gallery in one matrix multiply.
 
-        if best_score < THRESHOLD:
-            return "Unknown", best_score
-        return best_match, best_score
+        Args:
+            face_embeddings: (M x 512) array or list of embeddings.
+            top_k (int): Number of candidates to return per face.
 
-    def recognize_images_in_folder(self, folder_path, output_dir="recognized_results"):
-        """Process all images in a folder and recognize faces"""
-        os.makedirs(output_dir, exist_ok=True)
+        Returns:
+            list: For every face, a list of top_k (name, score) pairs. Candidates
+            scoring below THRESHOLD are reported as "Unknown".
+        """
+        if len(face_embeddings) == 0:
+            return []
 
-        results = {}  # dictionary to store all results
+        gallery, prototype_index = self.matchers
+        matcher = prototype_index if prototype_index is not None else gallery
+        if len(matcher) == 0:
+            return [[("Unknown", -1)] for _ in range(len(face_embeddings))]
+
+        with metrics.span("match"):
+            names, scores = matcher.search(face_embeddings, top_k=top_k)
+
+            matches = []
+            for face_names, face_scores in zip(names, scores):
+                matches.append([
+                    (name if score >= THRESHOLD else "Unknown", float(score))
+                    for name, score in zip(face_names, face_scores)
+                ])
 
+        metrics.inc("attendance_faces_total", len(matches))
+        metrics.inc("attendance_unknown_faces_total", int(np.sum(scores[:, 0] < THRESHOLD)))
+        return matches
+
+    @staticmethod
+    def iter_folder_frames(folder_path):
+        """Yield (image_name, frame) for every readable image in a folder"""
         for img_name in os.listdir(folder_path):
             img_path = os.path.join(folder_path, img_name)
 
@@ -94,33 +376,252 @@ class FaceRecognizer:
                 print(f"Could not read {img_path}")
                 continue
 
-            faces = self.app.get(frame)
-            detected_names = []
+            yield img_name, frame
+
+    def iter_recognized(self, frames, camera=None, sampler=None):
+        """
+        Detect, embed and match an iterable of (frame_name, frame) pairs.
+
+        With the batch engine, frames are detected one at a time and grouped
+        into batches of frame_batch_size for embedding; all their faces are
+        embedded in batched ONNX calls and matched against the gallery in one
+        matrix multiply.
+
+        With num_workers > 0 the frames are sharded across a pool of worker
+        processes instead (see ParallelFrameRecognizer); workers detect on
+        the full frame.
+
+        camera selects the per-camera detector in "multiscale" mode.
+        An optional AdaptiveFrameSampler hears each frame's face count right
+        after its detection, before the next frame is pulled, and the time
+        of detection, embedding and matching only (not of decoding). With
+        worker processes both are reported as results come back, with the
+        workers' compute time.
+
+        Yields:
+            (frame_name, frame, faces, matches) per frame, in input order.
+        """
+        if self.facerecognizeconfig.num_workers > 0:
+            yield from self.get_pool().iter_recognized(frames, sampler)
+            return
 
-            for face in faces:
-                bbox = face.bbox.astype(int)
-                embedding = face.normed_embedding
+        if self.engine is None:
+            for img_name, frame in frames:
+                started = time.perf_counter()
+                metrics.inc("attendance_frames_total")
+                with metrics.span("detect_embed"):
+                    faces = self.app.get(frame)
+                matches = self.recognize_faces([f.normed_embedding for f in faces])
+                if sampler is not None:
+                    sampler.report_faces(len(faces))
+                    sampler.report_time(time.perf_counter() - started)
+                yield img_name, frame, faces, matches
+            return
 
-                # Recognize face
-                name, score = self.recognize_face(embedding)
-                detected_names.append(f"{name}")
+        detector = self.get_detector(camera)
+        batch, detections = [], []
+        for img_name, frame in frames:
+            started = time.perf_counter()
+            faces = self.engine.detect([frame], detector, start_index=len(batch))[0]
+            if sampler is not None:
+                sampler.report_faces(len(faces))
+                sampler.report_time(time.perf_counter() - started)
+            batch.append((img_name, frame))
+            detections.append(faces)
+            if len(batch) == self.engine.config.frame_batch_size:
+                yield from self.embed_and_match(batch, detections, sampler)
+                batch, detections = [], []
+        if batch:
+            yield from self.embed_and_match(batch, detections, sampler)
 
-                # Draw results
-                cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), (0, 255, 0), 2)
-                cv2.putText(frame, f"{name} ({score:.2f})", (bbox[0], bbox[1] - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+    def embed_and_match(self, batch, detections, sampler=None):
+        """Embed the detected faces of a batch of frames and match them in one call"""
+        started = time.perf_counter()
+        self.engine.embed([frame for _, frame in batch], [face for faces in detections for face in faces])
+        per_frame = [[face for face in faces if face.normed_embedding is not None] for faces in detections]
+        all_faces = [face for faces in per_frame for face in faces]
+        all_matches = self.recognize_faces([face.normed_embedding for face in all_faces])
+        if sampler is not None:
+            sampler.report_time(time.perf_counter() - started, 0)   # frames are counted at detection
+
+        start = 0
+        for (img_name, frame), faces in zip(batch, per_frame):
+            yield img_name, frame, faces, all_matches[start:start + len(faces)]
+            start += len(faces)
+
+    def get_pool(self):
+        """Worker pool is started on first use and kept warm between sessions"""
+        if self.pool is None:
+            self.pool = ParallelFrameRecognizer(
+                self.facerecognizeconfig,
+                num_workers=self.facerecognizeconfig.num_workers,
+                threads_per_worker=self.facerecognizeconfig.threads_per_worker,
+                chunk_size=self.facerecognizeconfig.frame_batch_size,
+            )
+        return self.pool
+
+    def close(self):
+        self.stop_gallery_watcher()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def should_annotate(self, frame_index, detected_names):
+        mode = self.facerecognizeconfig.annotation_mode
+        if mode == "full":
+            return True
+        if mode == "sampled":
+            if frame_index % self.facerecognizeconfig.annotation_every_n == 0:
+                return True
+            return self.facerecognizeconfig.annotate_unknowns and "Unknown" in detected_names
+        return False
+
+    def recognize_frames(self, frames, output_dir="recognized_results", sampler=None, on_frame=None,
+                         structured=False, camera=None):
+        """
+        Recognize faces in an iterable of (frame_name, frame) pairs, e.g. the
+        generator from VideoToImage.iter_frames, without going through disk.
+
+        Annotated frames are only produced according to annotation_mode and
+        are drawn and written by a background AnnotationWriter. An optional
+        AdaptiveFrameSampler gets face-count and timing feedback.
+        on_frame(frame_name, [(name, score), ...]) is called per frame;
+        returning True stops processing (e.g. StreamingAttendanceCounter.update).
+
+        Returns:
+            dict: {frame_name: [names]}, or with structured=True a columnar
+            RecognitionResult (frame, identity, score, bbox per face).
+        """
+        writer = None
+        if self.facerecognizeconfig.annotation_mode != "off":
+            os.makedirs(output_dir, exist_ok=True)
+            writer = AnnotationWriter(self.facerecognizeconfig.annotation_queue_size)
+
+        results = {}  # dictionary to store all results
+        builder = RecognitionResultBuilder() if structured else None
 
-            # Save recognized image
-            save_path = os.path.join(output_dir, f"recognized_{img_name}")
-            cv2.imwrite(save_path, frame)
+        try:
+            recognized = self.iter_recognized(frames, camera, sampler=sampler)
+            for frame_index, (img_name, frame, faces, matches) in enumerate(recognized):
+                detected_names = []
+                annotations = []
+                identities = []
 
-            # Save results
-            results[img_name] = detected_names
-            print(f"{img_name} → {detected_names} | saved to {save_path}")
+                for face, face_matches in zip(faces, matches):
+                    name, score = face_matches[0]
+                    detected_names.append(f"{name}")
+                    identities.append((name, score))
+                    annotations.append((face.bbox.astype(int), f"{name} ({score:.2f})"))
 
-        return results  # return all results after processing folder
-    
-    
+                # Queue the annotated image for the background writer
+                if writer is not None and self.should_annotate(frame_index, detected_names):
+                    save_path = os.path.join(output_dir, f"recognized_{img_name}")
+                    writer.submit(save_path, frame, annotations)
+
+                # Save results
+                if builder is not None:
+                    builder.add_frame(img_name, [face.bbox for face in faces], identities)
+                else:
+                    results[img_name] = detected_names
+                print(f"{img_name} → {detected_names}")
+
+                if on_frame is not None and on_frame(img_name, identities):
+                    break
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if builder is not None:
+            return builder.build()
+        return results  # return all results after processing frames
+
+    def track_frames(self, frames, tracker_config: FaceTrackerConfig = None, sampler=None,
+                     on_frame=None, camera=None):
+        """
+        Detect faces in every frame but embed each person once per track.
+
+        A FaceTracker links detections across frames; only faces starting a
+        new track or due for re-verification go through ArcFace. Tracks carry
+        the identity vote of their embeddings.
+
+        An optional AdaptiveFrameSampler gets face-count and timing feedback.
+        on_frame(frame_name, [(name, score), ...]) is called per frame with the
+        identities of its tracks; returning True stops processing.
+
+        Returns:
+            (list, dict): Per-track evidence for AttendanceMarker and the
+            tracking stats (detections vs embedding calls).
+        """
+        evidence, stats = self.track_cameras(
+            ((camera, img_name, frame) for img_name, frame in frames),
+            tracker_config=tracker_config, samplers={camera: sampler}, on_frame=on_frame,
+        )
+        stats.pop("cameras")
+        return evidence, stats
+
+    def track_cameras(self, camera_frames, tracker_config: FaceTrackerConfig = None, samplers=None,
+                      on_frame=None):
+        """
+        track_frames() for interleaved frames of several cameras.
+
+        Every camera gets its own FaceTracker, detector (see get_detector) and
+        embedding batch, so tracks never jump between cameras.
+
+        Args:
+            camera_frames: Iterable of (camera, frame_name, frame), e.g.
+                CaptureService.frames().
+            samplers (dict): Optional {camera: AdaptiveFrameSampler}.
+
+        Returns:
+            (list, dict): Per-track evidence (with a "camera" key) and the
+            tracking stats summed over cameras, with the per-camera stats
+            under "cameras".
+        """
+        engine = self.engine or BatchRecognitionEngine(self.app)
+        samplers = samplers or {}
+        streams = {}
+        stopped = False
+        for camera, img_name, frame in camera_frames:
+            stream = streams.get(camera)
+            if stream is None:
+                stream = streams[camera] = TrackingStream(
+                    self, engine, camera, tracker_config, samplers.get(camera)
+                )
+            stream.add(img_name, frame)
+            if len(stream.batch) >= engine.config.frame_batch_size:
+                stopped = self._notify_tracks(stream.flush(), on_frame)
+                if stopped:
+                    break
+        for stream in streams.values():
+            if stopped:
+                break
+            stopped = self._notify_tracks(stream.flush(), on_frame)
+
+        evidence = []
+        for camera, stream in streams.items():
+            evidence.extend(dict(e, camera=camera) for e in stream.tracker.evidence())
+        per_camera = {camera: stream.stats() for camera, stream in streams.items()}
+        stats = {
+            key: sum(s[key] for s in per_camera.values())
+            for key in ("detections", "embeddings", "tracks", "frames")
+        }
+        stats["embedding_reduction"] = round(stats["detections"] / max(stats["embeddings"], 1), 2)
+        stats["cameras"] = per_camera
+        logging.info(f"Tracking stats: {stats}")
+        print("Tracking stats:", stats)
+        return evidence, stats
+
+    @staticmethod
+    def _notify_tracks(frame_tracks, on_frame):
+        """Hand each flushed frame's track identities to on_frame; True = stop"""
+        return on_frame is not None and any(
+            on_frame(img_name, [(t.name, t.score) for t in tracks])
+            for img_name, tracks in frame_tracks
+        )
+
+    def recognize_images_in_folder(self, folder_path, output_dir="recognized_results", structured=False):
+        """Process all images in a folder and recognize faces"""
+        return self.recognize_frames(self.iter_folder_frames(folder_path), output_dir, structured=structured)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+import numpy as np
+from dataclasses import dataclass, field
+
+
+@dataclass
+class FaceTrackerConfig:
+    iou_threshold: float = 0.3      # minimum IoU to continue a track
+    max_missed: int = 5             # sampled frames a track survives without a detection
+    reverify_every: int = 15        # re-embed a live track every N sampled frames
+    smoothing: float = 0.6          # alpha of the alpha-beta (constant velocity) filter
+
+
+@dataclass
+class Track:
+    track_id: int
+    bbox: np.ndarray
+    first_frame: int
+    last_frame: int
+    velocity: np.ndarray = field(default_factory=lambda: np.zeros(4, dtype=np.float32))
+    missed: int = 0
+    hits: int = 1
+    last_embedded: int = -1
+    name: str = "Unknown"
+    score: float = -1.0
+    votes: dict = field(default_factory=dict)   # name -> summed similarity
+    best: dict = field(default_factory=dict)    # name -> best single similarity
+
+    def predict(self):
+        return self.bbox + self.velocity
+
+    def add_vote(self, name, score):
+        self.votes[name] = self.votes.get(name, 0.0) + score
+        self.best[name] = max(self.best.get(name, -1.0), score)
+        self.name = max(self.votes, key=self.votes.get)
+        self.score = self.best[self.name]
+
+    def evidence(self):
+        """Per-track evidence handed to AttendanceMarker"""
+        return {
+            "track_id": self.track_id,
+            "name": self.name,
+            "score": float(self.score),
+            "frames": self.hits,
+            "first_frame": self.first_frame,
+            "last_frame": self.last_frame,
+        }
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU of two (N x 4) / (M x 4) x1,y1,x2,y2 arrays"""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+    a = np.asarray(boxes_a, dtype=np.float32)[:, None, :]
+    b = np.asarray(boxes_b, dtype=np.float32)[None, :, :]
+    ix = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    iy = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = ix * iy
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+class FaceTracker:
+    """
+    Lightweight CPU multi-object tracker between detection and recognition.
+
+    Detections are associated with existing tracks by greedy IoU against the
+    constant-velocity prediction of each track. Only faces that start a track,
+    or whose track is due for re-verification, need an embedding.
+    """
+
+    def __init__(self, config: FaceTrackerConfig = None):
+        self.config = config or FaceTrackerConfig()
+        self.tracks = []
+        self.finished = []
+        self.next_id = 0
+        self.detections = 0
+        self.embeddings = 0
+
+    def update(self, frame_index, bboxes):
+        """
+        Args:
+            frame_index (int): Index of the sampled frame.
+            bboxes (array): (M x 4) detected boxes of this frame.
+
+        Returns:
+            (tracks, needs_embedding): the Track assigned to every detection
+            and a boolean mask of the detections that must be embedded.
+        """
+        bboxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+        self.detections += len(bboxes)
+
+        predicted = [t.predict() for t in self.tracks]
+        ious = iou_matrix(predicted, bboxes)
+
+        assigned = [None] * len(bboxes)
+        used_tracks = set()
+        if ious.size:
+            pairs = np.argwhere(ious >= self.config.iou_threshold)
+            order = np.argsort(-ious[pairs[:, 0], pairs[:, 1]])
+            for t_idx, d_idx in pairs[order]:
+                if t_idx in used_tracks or assigned[d_idx] is not None:
+                    continue
+                used_tracks.add(t_idx)
+                assigned[d_idx] = self.tracks[t_idx]
+
+        alpha = self.config.smoothing
+        needs_embedding = np.zeros(len(bboxes), dtype=bool)
+        for d_idx, track in enumerate(assigned):
+            if track is None:
+                track = Track(self.next_id, bboxes[d_idx], frame_index, frame_index)
+                self.next_id += 1
+                self.tracks.append(track)
+                assigned[d_idx] = track
+                needs_embedding[d_idx] = True
+                continue
+
+            new_box = alpha * bboxes[d_idx] + (1 - alpha) * track.predict()
+            track.velocity = new_box - track.bbox
+            track.bbox = new_box
+            track.missed = 0
+            track.hits += 1
+            track.last_frame = frame_index
+            if frame_index - track.last_embedded >= self.config.reverify_every:
+                needs_embedding[d_idx] = True
+
+        # Age out tracks that were not seen in this frame
+        matched = {id(t) for t in assigned}
+        alive = []
+        for track in self.tracks:
+            if id(track) not in matched:
+                track.missed += 1
+            if track.missed > self.config.max_missed:
+                self.finished.append(track)
+            else:
+                alive.append(track)
+        self.tracks = alive
+
+        self.embeddings += int(needs_embedding.sum())
+        return assigned, needs_embedding
+
+    def evidence(self):
+        """Evidence of every track (finished and still alive)"""
+        return [t.evidence() for t in self.finished + self.tracks]
+
+    def stats(self):
+        return {
+            "detections": self.detections,
+            "embeddings": self.embeddings,
+            "tracks": self.next_id,
+            "embedding_reduction": round(self.detections / max(self.embeddings, 1), 2),
+        }
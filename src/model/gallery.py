@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class FaceGallery:
+    """
+    Known identities held as one pre-normalized (N x 512) float32 matrix
+    with a parallel array of names, so a whole frame of faces can be
+    scored with a single matrix multiply.
+    """
+
+    def __init__(self, names, matrix, normalized=False):
+        self.names = np.asarray(list(names), dtype=object)
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if matrix.size == 0:
+            matrix = matrix.reshape(0, matrix.shape[-1] if matrix.ndim == 2 else 512)
+        # Already-unit rows (e.g. a memory-mapped packed gallery) are used as-is
+        self.matrix = matrix if normalized else l2_normalize(matrix)
+
+    @classmethod
+    def from_embeddings(cls, people_embeddings: dict):
+        """Build a gallery from a {person: embedding} dictionary"""
+        names = list(people_embeddings.keys())
+        if not names:
+            return cls([], np.zeros((0, 512), dtype=np.float32))
+        matrix = np.stack([np.asarray(people_embeddings[n], dtype=np.float32) for n in names])
+        return cls(names, matrix)
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, face_embeddings, top_k=1):
+        """
+        Score every face against every identity in one matmul.
+
+        Args:
+            face_embeddings: (M x 512) array, or a list of 512-D vectors.
+            top_k (int): Number of best identities to return per face.
+
+        Returns:
+            (names, scores): two (M x k) arrays sorted by descending score.
+        """
+        queries = l2_normalize(np.atleast_2d(np.asarray(face_embeddings, dtype=np.float32)))
+        k = min(top_k, len(self))
+        if k == 0 or queries.shape[0] == 0:
+            return (np.empty((queries.shape[0], 0), dtype=object),
+                    np.empty((queries.shape[0], 0), dtype=np.float32))
+
+        sims = queries @ self.matrix.T  # (M x N) cosine similarities
+
+        if k < sims.shape[1]:
+            idx = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        else:
+            idx = np.broadcast_to(np.arange(sims.shape[1]), sims.shape).copy()
+        top_scores = np.take_along_axis(sims, idx, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        idx = np.take_along_axis(idx, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return self.names[idx], top_scores
+
+
+def l2_normalize(matrix):
+    """Row-wise L2 normalisation that leaves all-zero rows untouched"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.size == 0:
+        return matrix
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
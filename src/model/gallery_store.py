@@ -0,0 +1,196 @@
+import os
+import sys
+import json
+import threading
+import numpy as np
+from datetime import datetime
+from dataclasses import dataclass
+
+from src.model.gallery import l2_normalize
+from src.utils.exception import CustomException
+from src.utils.logger import logging
+
+
+@dataclass
+class GalleryStoreConfig:
+    root: str = os.path.join("C:/ht/embeddings")
+    manifest_name: str = "gallery.json"
+    keep_versions: int = 2      # older packed files are removed after a publish
+
+
+@dataclass
+class PackedGallery:
+    version: str
+    names: list
+    means: np.ndarray           # (N x 512) float32, unit rows
+    all_vectors: np.ndarray     # (P x 512) float32, unit rows
+    all_labels: np.ndarray      # (P,) row index into names for every prototype
+
+
+# Serialises read-modify-write publishes from concurrent enrollment threads
+_PUBLISH_LOCK = threading.RLock()
+
+
+class GalleryStore:
+    """
+    One consolidated gallery artifact next to the per-student folders.
+
+    Every publish writes a new set of versioned .npy files and then swaps the
+    gallery.json manifest with an atomic rename, so readers always see either
+    the old or the new gallery. Readers open the matrices with mmap_mode="r",
+    letting several recognizer processes share the same pages.
+    """
+
+    def __init__(self, root=None):
+        self.config = GalleryStoreConfig()
+        if root is not None:
+            self.config.root = root
+        os.makedirs(self.config.root, exist_ok=True)
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.config.root, self.config.manifest_name)
+
+    def _write_atomic(self, file_name, writer):
+        final_path = os.path.join(self.config.root, file_name)
+        tmp_path = final_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            writer(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, final_path)
+
+    def read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def version(self):
+        """Version stamp of the currently published gallery, or None"""
+        manifest = self.read_manifest()
+        return manifest["version"] if manifest else None
+
+    def publish(self, names, means, all_vectors=None, all_labels=None):
+        """
+        Write a new gallery version and atomically make it the current one.
+
+        Args:
+            names (list): Identity (USN) per row of `means`.
+            means (array): (N x 512) mean embeddings.
+            all_vectors (array, optional): (P x 512) every stored prototype.
+            all_labels (array, optional): (P,) row of `names` for each prototype.
+
+        Returns:
+            str: The published version stamp.
+        """
+        try:
+            names = [str(n) for n in names]
+            means = l2_normalize(np.asarray(means, dtype=np.float32).reshape(len(names), -1))
+            if all_vectors is None:
+                all_vectors, all_labels = means, np.arange(len(names))
+            all_vectors = l2_normalize(np.asarray(all_vectors, dtype=np.float32))
+            all_labels = np.asarray(all_labels, dtype=np.int32)
+
+            with _PUBLISH_LOCK:
+                return self._publish(names, means, all_vectors, all_labels)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _publish(self, names, means, all_vectors, all_labels):
+        version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        files = {
+            "means": f"gallery_{version}_mean.npy",
+            "all_vectors": f"gallery_{version}_all.npy",
+            "all_labels": f"gallery_{version}_labels.npy",
+        }
+        self._write_atomic(files["means"], lambda f: np.save(f, means))
+        self._write_atomic(files["all_vectors"], lambda f: np.save(f, all_vectors))
+        self._write_atomic(files["all_labels"], lambda f: np.save(f, all_labels))
+
+        manifest = {"version": version, "names": names, "files": files}
+        self._write_atomic(
+            self.config.manifest_name,
+            lambda f: f.write(json.dumps(manifest).encode("utf-8")),
+        )
+        self._remove_old_versions()
+
+        logging.info(f"Published gallery version {version} with {len(names)} identities")
+        return version
+
+    def _remove_old_versions(self):
+        versions = sorted({
+            f.split("_")[1] for f in os.listdir(self.config.root)
+            if f.startswith("gallery_") and f.endswith(".npy")
+        })
+        for old in versions[:-self.config.keep_versions]:
+            for suffix in ("mean", "all", "labels"):
+                path = os.path.join(self.config.root, f"gallery_{old}_{suffix}.npy")
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass    # still mapped by a reader (Windows) or already gone
+
+    def load(self, mmap=True):
+        """Open the current gallery with one manifest read; None if not published"""
+        manifest = self.read_manifest()
+        if manifest is None:
+            return None
+        mode = "r" if mmap else None
+        files = manifest["files"]
+        return PackedGallery(
+            version=manifest["version"],
+            names=manifest["names"],
+            means=np.load(os.path.join(self.config.root, files["means"]), mmap_mode=mode),
+            all_vectors=np.load(os.path.join(self.config.root, files["all_vectors"]), mmap_mode=mode),
+            all_labels=np.load(os.path.join(self.config.root, files["all_labels"]), mmap_mode=mode),
+        )
+
+    def upsert(self, name, mean, prototypes):
+        """Replace (or add) one identity and publish a new version"""
+        with _PUBLISH_LOCK:
+            return self._upsert(name, mean, prototypes)
+
+    def _upsert(self, name, mean, prototypes):
+        current = self.load(mmap=False)
+        if current is None:
+            return self.rebuild_from_folders()
+
+        names = list(current.names)
+        keep = np.ones(len(current.all_labels), dtype=bool)
+        means = np.array(current.means)
+        if name in names:
+            row = names.index(name)
+            means[row] = mean
+            keep = current.all_labels != row
+        else:
+            row = len(names)
+            names.append(name)
+            means = np.vstack([means, np.asarray(mean, dtype=np.float32)[None, :]])
+
+        prototypes = np.atleast_2d(np.asarray(prototypes, dtype=np.float32))
+        all_vectors = np.concatenate([current.all_vectors[keep], prototypes])
+        all_labels = np.concatenate([current.all_labels[keep], np.full(len(prototypes), row)])
+        return self.publish(names, means, all_vectors, all_labels)
+
+    def rebuild_from_folders(self):
+        """Pack every <person>/mean_embedding.npy + all_embeddings.npy under root"""
+        names, means, all_vectors, all_labels = [], [], [], []
+        for person in sorted(os.listdir(self.config.root)):
+            person_dir = os.path.join(self.config.root, person)
+            mean_path = os.path.join(person_dir, "mean_embedding.npy")
+            if not os.path.isdir(person_dir) or not os.path.exists(mean_path):
+                continue
+            all_path = os.path.join(person_dir, "all_embeddings.npy")
+            mean_vec = np.load(mean_path)
+            prototypes = np.load(all_path) if os.path.exists(all_path) else mean_vec[None, :]
+
+            all_labels.append(np.full(len(prototypes), len(names)))
+            names.append(person)
+            means.append(mean_vec)
+            all_vectors.append(prototypes)
+
+        if not names:
+            return None
+        return self.publish(names, np.stack(means), np.concatenate(all_vectors), np.concatenate(all_labels))
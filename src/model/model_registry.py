@@ -0,0 +1,73 @@
+import sys
+import threading
+import onnxruntime
+from insightface.app import FaceAnalysis
+
+from src.utils.exception import CustomException
+from src.utils.logger import logging
+
+
+MODEL_PATH = "C:/ht/models"
+
+_MODELS = {}
+_LOCK = threading.Lock()
+
+
+def get_face_analysis(
+    name: str = "buffalo_l",
+    root: str = MODEL_PATH,
+    det_size=(640, 640),
+    providers=("CPUExecutionProvider",),
+    ctx_id: int = 0,
+    intra_op_threads: int = 0,
+    inter_op_threads: int = 0,
+):
+    """
+    Process-wide FaceAnalysis registry.
+
+    Each (name, root, det_size, providers, threads) configuration is loaded
+    once, on first use, and the same prepared instance is handed to every
+    caller. Non-zero intra/inter-op thread counts rebuild the ONNX sessions
+    with explicit SessionOptions (0 keeps the ONNX Runtime default).
+
+    Returns:
+        FaceAnalysis: The shared, prepared model.
+    """
+    key = (name, root, tuple(det_size), tuple(providers), ctx_id, intra_op_threads, inter_op_threads)
+    model = _MODELS.get(key)
+    if model is not None:
+        return model
+
+    with _LOCK:
+        model = _MODELS.get(key)    # another thread may have loaded it meanwhile
+        if model is None:
+            try:
+                logging.info(f"Loading FaceAnalysis model {key}")
+                model = FaceAnalysis(name=name, root=root, providers=list(providers))
+                if intra_op_threads or inter_op_threads:
+                    _limit_session_threads(model, providers, intra_op_threads, inter_op_threads)
+                model.prepare(ctx_id=ctx_id, det_size=tuple(det_size))
+                _MODELS[key] = model
+            except Exception as e:
+                raise CustomException(e, sys)
+    return model
+
+
+def _limit_session_threads(model, providers, intra_op_threads, inter_op_threads):
+    """Recreate every sub-model's ONNX session with explicit thread counts"""
+    options = onnxruntime.SessionOptions()
+    if intra_op_threads:
+        options.intra_op_num_threads = intra_op_threads
+    if inter_op_threads:
+        options.inter_op_num_threads = inter_op_threads
+    if inter_op_threads > 1:
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_PARALLEL
+    for sub_model in model.models.values():
+        sub_model.session = onnxruntime.InferenceSession(
+            sub_model.model_file, sess_options=options, providers=list(providers)
+        )
+
+
+def loaded_models():
+    """Configurations currently held by the registry"""
+    return list(_MODELS.keys())
@@ -0,0 +1,183 @@
+import numpy as np
+from dataclasses import dataclass, field
+
+from src.utils.logger import logging
+
+
+@dataclass
+class MultiScaleDetectorConfig:
+    coarse_size: tuple = (320, 320)     # input size of the low-resolution full-frame pass
+    tile_size: int = 640                # native-resolution tiles, detected at this input size
+    tile_overlap: float = 0.25          # so faces on a tile border are whole in one tile
+    small_face: int = 64                # faces narrower than this (px) are (re-)detected in tiles
+    rois: list = field(default_factory=list)   # [x1, y1, x2, y2] frame fractions always tiled (e.g. back rows)
+    hot_frames: int = 30                # a tile stays scanned this many frames after a small face
+    full_scan_every: int = 50           # every N frames tile the whole frame; 0 = first frame only
+    nms_threshold: float = 0.4
+
+
+def nms(dets, threshold):
+    """Greedy non-maximum suppression of (N x 5) x1,y1,x2,y2,score boxes; returns kept indices"""
+    x1, y1, x2, y2, scores = dets[:, 0], dets[:, 1], dets[:, 2], dets[:, 3], dets[:, 4]
+    areas = (x2 - x1 + 1) * (y2 - y1 + 1)
+    order = scores.argsort()[::-1]
+
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        inter = np.maximum(0.0, xx2 - xx1 + 1) * np.maximum(0.0, yy2 - yy1 + 1)
+        ovr = inter / (areas[i] + areas[order[1:]] - inter)
+        order = order[np.where(ovr <= threshold)[0] + 1]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def tile_grid(height, width, tile, overlap):
+    """x1, y1, x2, y2 of overlapping tiles covering a height x width frame"""
+    stride = max(1, int(tile * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile:
+            return [0]
+        points = list(range(0, length - tile, stride))
+        return points + [length - tile]
+
+    return np.array([
+        (x, y, min(x + tile, width), min(y + tile, height))
+        for y in starts(height) for x in starts(width)
+    ], dtype=np.int32).reshape(-1, 4)
+
+
+class MultiScaleDetector:
+    """
+    Coarse-to-fine face detection for one camera.
+
+    Every frame gets a cheap low-resolution pass over the whole frame. Tiles
+    at native resolution are only detected where small faces are likely: the
+    configured ROIs, tiles holding a small coarse face and tiles that had a
+    small face in the last hot_frames frames. The whole frame is tiled on the
+    first frame after reset() (and every full_scan_every frames) to find
+    faces nobody expected. All boxes are merged with NMS.
+
+    detect() has the signature of the insightface detector's detect, so it
+    can stand in for it in BatchRecognitionEngine. The hot-tile memory makes
+    an instance stateful: use one per camera.
+    """
+
+    def __init__(self, det_model, config: MultiScaleDetectorConfig = None):
+        self.det_model = det_model
+        self.config = config or MultiScaleDetectorConfig()
+        self.frame_count = 0
+        self.frame_shape = None
+        self.tiles = None
+        self.last_hit = None
+        self.tile_passes = 0
+        self.detector_pixels = 0
+        self.full_frame_pixels = 0
+
+    def reset(self):
+        """Start a new session: forget hot tiles and full-scan the next frame"""
+        self.frame_count = 0
+        if self.last_hit is not None:
+            self.last_hit[:] = -np.inf
+        self.tile_passes = 0
+        self.detector_pixels = 0
+        self.full_frame_pixels = 0
+
+    def _prepare(self, shape):
+        height, width = shape[:2]
+        self.frame_shape = (height, width)
+        self.tiles = tile_grid(height, width, self.config.tile_size, self.config.tile_overlap)
+        self.last_hit = np.full(len(self.tiles), -np.inf)
+
+        self.roi_tiles = np.zeros(len(self.tiles), dtype=bool)
+        for fx1, fy1, fx2, fy2 in self.config.rois:
+            roi = np.array([fx1 * width, fy1 * height, fx2 * width, fy2 * height])
+            self.roi_tiles |= self._tiles_touching(roi[None, :])
+
+    def _tiles_touching(self, boxes):
+        """Mask of tiles that overlap any of the boxes"""
+        if len(boxes) == 0:
+            return np.zeros(len(self.tiles), dtype=bool)
+        t = self.tiles[:, None, :]
+        b = np.asarray(boxes, dtype=np.float32)[None, :, :4]
+        overlap = (t[..., 0] < b[..., 2]) & (b[..., 0] < t[..., 2]) & \
+                  (t[..., 1] < b[..., 3]) & (b[..., 1] < t[..., 3])
+        return overlap.any(axis=1)
+
+    def _run(self, img, input_size):
+        bboxes, kpss = self.det_model.detect(img, input_size=input_size, max_num=0)
+        self.detector_pixels += input_size[0] * input_size[1]
+        if kpss is None:
+            kpss = np.zeros((len(bboxes), 5, 2), dtype=np.float32)
+        return bboxes, kpss
+
+    def tiles_to_scan(self, coarse_boxes):
+        full_scan = self.frame_count == 0 or (
+            self.config.full_scan_every > 0 and self.frame_count % self.config.full_scan_every == 0
+        )
+        if full_scan:
+            return np.ones(len(self.tiles), dtype=bool)
+
+        small = coarse_boxes[coarse_boxes[:, 2] - coarse_boxes[:, 0] < self.config.small_face]
+        hot = self.frame_count - self.last_hit <= self.config.hot_frames
+        return self.roi_tiles | hot | self._tiles_touching(small)
+
+    def detect(self, img, input_size=None, max_num=0, metric="default"):
+        """
+        Returns:
+            (bboxes, kpss): (N x 5) boxes with scores and (N x 5 x 2) landmarks
+            in full-frame coordinates, like the insightface detector.
+        """
+        if self.frame_shape != img.shape[:2]:
+            self._prepare(img.shape)
+        height, width = self.frame_shape
+        self.full_frame_pixels += height * width
+
+        all_boxes, all_kps = [], []
+        coarse_boxes, coarse_kps = self._run(img, self.config.coarse_size)
+        all_boxes.append(coarse_boxes)
+        all_kps.append(coarse_kps)
+
+        scan = self.tiles_to_scan(coarse_boxes)
+        tile = self.config.tile_size
+        for t_idx in np.flatnonzero(scan):
+            x1, y1, x2, y2 = self.tiles[t_idx]
+            bboxes, kpss = self._run(img[y1:y2, x1:x2], (tile, tile))
+            self.tile_passes += 1
+            if len(bboxes) == 0:
+                continue
+            if (bboxes[:, 2] - bboxes[:, 0] < self.config.small_face).any():
+                self.last_hit[t_idx] = self.frame_count
+            bboxes = bboxes.copy()
+            bboxes[:, [0, 2]] += x1
+            bboxes[:, [1, 3]] += y1
+            all_boxes.append(bboxes)
+            all_kps.append(kpss + np.array([x1, y1], dtype=np.float32))
+
+        self.frame_count += 1
+
+        bboxes = np.concatenate(all_boxes).reshape(-1, 5)
+        kpss = np.concatenate(all_kps).reshape(-1, 5, 2)
+        if len(bboxes) == 0:
+            return bboxes, kpss
+
+        keep = nms(bboxes, self.config.nms_threshold)
+        if max_num > 0:
+            keep = keep[:max_num]
+        return bboxes[keep], kpss[keep]
+
+    def stats(self):
+        """Detector input pixels relative to one full-resolution pass per frame"""
+        stats = {
+            "frames": self.frame_count,
+            "tiles": len(self.tiles) if self.tiles is not None else 0,
+            "tile_passes": self.tile_passes,
+            "detector_cost_ratio": round(self.detector_pixels / max(self.full_frame_pixels, 1), 3),
+        }
+        logging.info(f"Multi-scale detector stats: {stats}")
+        return stats
@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+from collections import deque
+from dataclasses import replace
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+
+from src.utils.exception import CustomException
+from src.utils.logger import logging
+
+
+# Warm recognizer owned by each worker process
+_worker_recognizer = None
+
+
+def _init_worker(recognizer_config, threads_per_worker):
+    """Build one recognizer per worker with its own thread-limited ONNX sessions"""
+    global _worker_recognizer
+    os.environ["OMP_NUM_THREADS"] = str(threads_per_worker)
+
+    from src.model.face_recognizer import FaceRecognizer
+
+    config = replace(
+        recognizer_config,
+        num_workers=0,
+        intra_op_threads=threads_per_worker,
+        inter_op_threads=1,
+    )
+    _worker_recognizer = FaceRecognizer(config)
+    logging.info(f"Recognition worker {os.getpid()} ready with {threads_per_worker} threads")
+
+
+def _recognize_chunk(chunk):
+    """
+    Detect, embed and match a chunk of (frame_name, frame) pairs in a worker.
+
+    Returns:
+        (list, float): (faces, matches) per frame and the worker's compute seconds.
+    """
+    started = time.perf_counter()
+    results = [(faces, matches) for _, _, faces, matches in _worker_recognizer.iter_recognized(chunk)]
+    return results, time.perf_counter() - started
+
+
+class ParallelFrameRecognizer:
+    """
+    Shards frames across a pool of worker processes, each owning a warm
+    FaceRecognizer, and yields the results back in frame order.
+    """
+
+    def __init__(self, recognizer_config, num_workers=None, threads_per_worker=1, chunk_size=8):
+        try:
+            cpus = os.cpu_count() or 1
+            self.num_workers = num_workers or max(1, cpus // threads_per_worker)
+            self.threads_per_worker = threads_per_worker
+            self.chunk_size = chunk_size
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                initializer=_init_worker,
+                initargs=(recognizer_config, threads_per_worker),
+            )
+            logging.info(
+                f"Started {self.num_workers} recognition workers x {threads_per_worker} threads"
+            )
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def iter_recognized(self, frames, sampler=None):
+        """
+        Same contract as FaceRecognizer.iter_recognized. At most two chunks
+        per worker are in flight, so memory stays bounded on long videos.
+        An optional sampler gets each frame's face count and its share of
+        the worker's compute time as results come back.
+
+        Yields:
+            (frame_name, frame, faces, matches) per frame, in input order.
+        """
+        frames = iter(frames)
+        pending = deque()
+        max_in_flight = 2 * self.num_workers
+
+        while True:
+            while len(pending) < max_in_flight:
+                chunk = list(islice(frames, self.chunk_size))
+                if not chunk:
+                    break
+                pending.append((chunk, self.executor.submit(_recognize_chunk, chunk)))
+
+            if not pending:
+                break
+
+            chunk, future = pending.popleft()
+            results, seconds = future.result()
+            for (img_name, frame), (faces, matches) in zip(chunk, results):
+                if sampler is not None:
+                    sampler.report_faces(len(faces))
+                    sampler.report_time(seconds / len(chunk))
+                yield img_name, frame, faces, matches
+
+    def close(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,81 @@
+import numpy as np
+
+
+# One row per detected face
+RECOGNITION_DTYPE = np.dtype([
+    ("frame", np.int32),        # index into RecognitionResult.frame_names
+    ("identity", np.int32),     # index into RecognitionResult.identities, -1 = Unknown
+    ("score", np.float32),
+    ("x1", np.float32),
+    ("y1", np.float32),
+    ("x2", np.float32),
+    ("y2", np.float32),
+])
+
+
+class RecognitionResult:
+    """
+    Columnar recognition output: a numpy record array of detections plus the
+    frame-name and identity lookup tables its integer columns point into.
+    """
+
+    def __init__(self, records, frame_names, identities):
+        self.records = records
+        self.frame_names = list(frame_names)
+        self.identities = list(identities)
+
+    def __len__(self):
+        return len(self.records)
+
+    def names(self):
+        """Identity name of every record ("Unknown" for -1)"""
+        lookup = np.array(self.identities + ["Unknown"], dtype=object)
+        return lookup[self.records["identity"]]
+
+    def to_dict(self):
+        """Legacy {frame_name: [names]} view"""
+        results = {name: [] for name in self.frame_names}
+        for frame, name in zip(self.records["frame"], self.names()):
+            results[self.frame_names[frame]].append(name)
+        return results
+
+
+class RecognitionResultBuilder:
+    """Appends per-frame detections into growing column chunks"""
+
+    def __init__(self, chunk_size: int = 4096):
+        self.chunk_size = chunk_size
+        self.chunks = []
+        self.current = np.empty(chunk_size, dtype=RECOGNITION_DTYPE)
+        self.filled = 0
+        self.frame_names = []
+        self.identity_ids = {}
+
+    def identity_id(self, name):
+        if name == "Unknown":
+            return -1
+        if name not in self.identity_ids:
+            self.identity_ids[name] = len(self.identity_ids)
+        return self.identity_ids[name]
+
+    def add_frame(self, frame_name, bboxes, identities):
+        """
+        Args:
+            frame_name (str): Name of the frame.
+            bboxes (list): x1, y1, x2, y2 per face.
+            identities (list): (name, score) per face.
+        """
+        frame = len(self.frame_names)
+        self.frame_names.append(frame_name)
+        for bbox, (name, score) in zip(bboxes, identities):
+            if self.filled == self.chunk_size:
+                self.chunks.append(self.current)
+                self.current = np.empty(self.chunk_size, dtype=RECOGNITION_DTYPE)
+                self.filled = 0
+            self.current[self.filled] = (frame, self.identity_id(name), score, *bbox[:4])
+            self.filled += 1
+
+    def build(self):
+        records = np.concatenate(self.chunks + [self.current[:self.filled]])
+        identities = sorted(self.identity_ids, key=self.identity_ids.get)
+        return RecognitionResult(records, self.frame_names, identities)
@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import sqlite3
+import threading
+import requests
+from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+
+from src.utils.exception import CustomException
+from src.utils.logger import logging
+from src.utils.metrics import metrics
+
+
+@dataclass
+class AttendanceOutboxConfig:
+    db_path: str = "C:/ht/outbox/attendance_outbox.db"
+    endpoint: str = "http://localhost:8080/attendance/bulk"
+    batch_sessions: int = 20        # sessions merged into one POST
+    poll_interval: float = 1.0      # idle sleep of the sender thread
+    connect_timeout: float = 3.05
+    read_timeout: float = 10.0
+    base_backoff: float = 1.0       # first retry delay, doubled per attempt
+    max_backoff: float = 300.0
+    pool_size: int = 4              # pooled keep-alive connections to the backend
+
+
+class AttendanceOutbox:
+    """
+    Durable SQLite queue of attendance sessions waiting to be published.
+
+    Each appended session is one row. The sender claims rows into a batch
+    whose id is the request's Idempotency-Key. A failed batch is retried
+    with exactly the same rows, so the backend can deduplicate retries.
+    """
+
+    def __init__(self, db_path):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self.lock = threading.Lock()
+            self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_key TEXT UNIQUE NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    batch_id TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    last_error TEXT
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, next_attempt_at)")
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def append(self, records, session_key=None):
+        """Persist one session's records; returns its session key"""
+        session_key = session_key or uuid.uuid4().hex
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO outbox (session_key, payload, created_at) VALUES (?, ?, ?)",
+                (session_key, json.dumps(records), time.time()),
+            )
+        return session_key
+
+    def claim_batch(self, max_sessions):
+        """
+        Rows of the next batch that is due, or (None, []) if nothing is due.
+        The oldest due batch is resumed first; while every unfinished batch
+        is backing off, new rows still form and send their own batch.
+        """
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT batch_id FROM outbox WHERE status = 'pending' AND batch_id IS NOT NULL "
+                "AND next_attempt_at <= ? ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                batch_id = row[0]
+            else:
+                batch_id = uuid.uuid4().hex
+                self.conn.execute(
+                    "UPDATE outbox SET batch_id = ? WHERE id IN ("
+                    "SELECT id FROM outbox WHERE status = 'pending' AND batch_id IS NULL "
+                    "ORDER BY id LIMIT ?)",
+                    (batch_id, max_sessions),
+                )
+            rows = self.conn.execute(
+                "SELECT id, payload, attempts, next_attempt_at FROM outbox "
+                "WHERE batch_id = ? AND status = 'pending' ORDER BY id",
+                (batch_id,),
+            ).fetchall()
+        if not rows:
+            return None, []
+        return batch_id, rows
+
+    def mark_sent(self, batch_id):
+        with self.lock:
+            self.conn.execute("UPDATE outbox SET status = 'sent' WHERE batch_id = ?", (batch_id,))
+
+    def mark_dead(self, batch_id, error):
+        """Rejected by the backend (4xx); kept for inspection, never retried"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE outbox SET status = 'dead', last_error = ? WHERE batch_id = ?", (error, batch_id)
+            )
+
+    def split_batch(self, batch_id):
+        """Give every row of a rejected batch its own batch (and Idempotency-Key)"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE outbox SET batch_id = batch_id || '-' || id WHERE batch_id = ?", (batch_id,)
+            )
+
+    def mark_retry(self, batch_id, attempts, next_attempt_at, error):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE batch_id = ?",
+                (attempts, next_attempt_at, error, batch_id),
+            )
+
+    def pending(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def counts(self):
+        with self.lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+
+
+class AttendancePublisher:
+    """
+    Publishes attendance sessions without blocking the pipeline.
+
+    publish() only appends to the durable outbox. A background sender merges
+    up to batch_sessions sessions into one POST over a pooled
+    requests.Session, with timeouts and exponential backoff with jitter.
+    Sessions left over from a previous run are sent on startup. A merged
+    batch rejected with a 4xx is split and its sessions are resent one by
+    one, so only the offending session is marked dead.
+    """
+
+    def __init__(self, config: AttendanceOutboxConfig = None, start=True):
+        self.config = config or AttendanceOutboxConfig()
+        self.outbox = AttendanceOutbox(self.config.db_path)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.config.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="attendance-publisher", daemon=True)
+        if start:
+            self.thread.start()
+
+    def publish(self, records, session_key=None):
+        """Queue one session's records; returns immediately with its key"""
+        session_key = self.outbox.append(records, session_key)
+        metrics.set("attendance_queue_depth", self.outbox.pending(), queue="outbox")
+        self.wakeup.set()
+        return session_key
+
+    def backoff(self, attempts):
+        delay = min(self.config.max_backoff, self.config.base_backoff * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def send_batch(self):
+        """
+        Send the next due batch.
+
+        Returns:
+            bool: True if a batch was attempted (successfully or not).
+        """
+        batch_id, rows = self.outbox.claim_batch(self.config.batch_sessions)
+        if batch_id is None:
+            return False
+
+        records = [record for _, payload, _, _ in rows for record in json.loads(payload)]
+        attempts = rows[0][2] + 1
+        try:
+            response = self.session.post(
+                self.config.endpoint,
+                json=records,
+                headers={"Idempotency-Key": batch_id},
+                timeout=(self.config.connect_timeout, self.config.read_timeout),
+            )
+            if response.status_code < 300 or response.status_code == 409:   # 409 = already stored
+                self.outbox.mark_sent(batch_id)
+                metrics.inc("attendance_outbox_sent_total", len(rows))
+                logging.info(f"Published batch {batch_id}: {len(rows)} sessions, {len(records)} records")
+                return True
+            if 400 <= response.status_code < 500 and response.status_code not in (408, 429):
+                if len(rows) > 1:
+                    # Find the offending session instead of dropping the whole batch
+                    self.outbox.split_batch(batch_id)
+                    logging.warning(f"Backend rejected batch {batch_id} with HTTP {response.status_code}; "
+                                    f"resending its {len(rows)} sessions one by one")
+                    return True
+                self.outbox.mark_dead(batch_id, f"HTTP {response.status_code}: {response.text[:200]}")
+                metrics.inc("attendance_outbox_dead_total", len(rows))
+                logging.error(f"Backend rejected batch {batch_id} with HTTP {response.status_code}")
+                return True
+            error = f"HTTP {response.status_code}"
+        except requests.RequestException as e:
+            error = str(e)
+
+        delay = self.backoff(attempts)
+        self.outbox.mark_retry(batch_id, attempts, time.time() + delay, error[:500])
+        metrics.inc("attendance_outbox_retries_total")
+        logging.warning(f"Publishing batch {batch_id} failed ({error}); attempt {attempts}, retry in {delay:.1f}s")
+        return True
+
+    def _run(self):
+        while not self.stopping.is_set():
+            try:
+                sent = self.send_batch()
+            except Exception as e:
+                logging.error(f"Attendance publisher error: {e}")
+                sent = False
+            metrics.set("attendance_queue_depth", self.outbox.pending(), queue="outbox")
+            if not sent:
+                self.wakeup.wait(self.config.poll_interval)
+                self.wakeup.clear()
+
+    def flush(self, timeout=10.0):
+        """Wait until the outbox is empty; returns the number still pending"""
+        deadline = time.time() + timeout
+        while self.outbox.pending() and time.time() < deadline:
+            self.wakeup.set()
+            time.sleep(0.05)
+        return self.outbox.pending()
+
+    def close(self, timeout=10.0):
+        pending = self.flush(timeout)
+        self.stopping.set()
+        self.wakeup.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout=5)
+        self.session.close()
+        if pending:
+            logging.info(f"{pending} attendance sessions left in the outbox for the next run")
+        return pending
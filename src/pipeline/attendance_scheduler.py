@@ -0,0 +1,130 @@
+import sys
+import json
+import threading
+from datetime import datetime, timedelta
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.exception import CustomException
+from src.utils.logger import logging
+
+
+@dataclass
+class TimetableSession:
+    room: str
+    camera: object                  # camera index, RTSP URL, video file or {name: source} of several cameras
+    start: str                      # "HH:MM", local time, every listed day
+    duration: int = 5               # seconds to record
+    roster: dict = field(default_factory=dict)     # student -> USN
+    days: list = None               # e.g. ["Mon", "Wed"]; None = every day
+    detection: dict = None          # MultiScaleDetectorConfig fields of this room's camera(s)
+
+    def start_on(self, day):
+        hour, minute = map(int, self.start.split(":"))
+        return datetime.combine(day, datetime.min.time()).replace(hour=hour, minute=minute)
+
+    def runs_on(self, day):
+        return self.days is None or day.strftime("%a") in self.days
+
+
+@dataclass
+class AttendanceSchedulerConfig:
+    poll_seconds: float = 30.0      # longest sleep between timetable checks
+    grace_seconds: float = 120.0    # a session may still start this late
+    max_parallel_sessions: int = 4  # overlapping rooms run concurrently
+
+
+class AttendanceScheduler:
+    """
+    Long-running timetable daemon.
+
+    Sessions are handed to `session_runner(session)`, which is expected to
+    reuse warm detector/recognizer instances and the loaded gallery, so no
+    model is loaded on a session's critical path. Sessions of different rooms
+    may overlap and run concurrently in this process; sessions of the same
+    room are serialised.
+    """
+
+    def __init__(self, timetable_path, session_runner, config: AttendanceSchedulerConfig = None):
+        self.config = config or AttendanceSchedulerConfig()
+        self.timetable_path = timetable_path
+        self.session_runner = session_runner
+        self.sessions = self.load_timetable()
+        self.executor = ThreadPoolExecutor(max_workers=self.config.max_parallel_sessions)
+        self.room_locks = {s.room: threading.Lock() for s in self.sessions}
+        self.launched = set()
+        self.stop_event = threading.Event()
+
+    def load_timetable(self):
+        """
+        Timetable JSON:
+            {"sessions": [{"room": "A101", "camera": 0, "start": "09:00",
+                           "duration": 5, "roster": {"kiran": "4AL23IS024"},
+                           "days": ["Mon", "Wed"],
+                           "detection": {"rois": [[0, 0, 1, 0.4]]}}]}
+
+        A room with several cameras lists them by name, e.g.
+        "camera": {"front": 0, "back": "rtsp://10.0.0.5/stream"}; they are
+        captured concurrently and tracked per camera.
+        """
+        try:
+            with open(self.timetable_path) as f:
+                data = json.load(f)
+            sessions = [TimetableSession(**entry) for entry in data["sessions"]]
+            logging.info(f"Loaded {len(sessions)} timetable sessions from {self.timetable_path}")
+            return sessions
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def due_sessions(self, now):
+        """Sessions whose start time passed less than grace_seconds ago"""
+        # Only today's starts can still be due; forget the earlier days
+        self.launched = {key for key in self.launched if key[1].date() >= now.date()}
+        due = []
+        for session in self.sessions:
+            if not session.runs_on(now.date()):
+                continue
+            start = session.start_on(now.date())
+            key = (session.room, start)
+            if key in self.launched:
+                continue
+            if start <= now <= start + timedelta(seconds=self.config.grace_seconds):
+                self.launched.add(key)
+                due.append(session)
+        return due
+
+    def seconds_to_next_start(self, now):
+        upcoming = []
+        for offset in (0, 1):
+            day = (now + timedelta(days=offset)).date()
+            for session in self.sessions:
+                start = session.start_on(day)
+                if session.runs_on(day) and start > now:
+                    upcoming.append((start - now).total_seconds())
+        return min(upcoming, default=self.config.poll_seconds)
+
+    def _run(self, session):
+        with self.room_locks[session.room]:
+            logging.info(f"Session started: room {session.room} at {session.start}")
+            try:
+                result = self.session_runner(session)
+                logging.info(f"Session finished: room {session.room}, {len(result or [])} records")
+                return result
+            except Exception as e:
+                logging.error(f"Session failed: room {session.room}: {e}")
+
+    def run_forever(self):
+        logging.info("Attendance scheduler started")
+        try:
+            while not self.stop_event.is_set():
+                now = datetime.now()
+                for session in self.due_sessions(now):
+                    self.executor.submit(self._run, session)
+                wait = min(self.seconds_to_next_start(now), self.config.poll_seconds)
+                self.stop_event.wait(max(wait, 0.5))
+        finally:
+            self.executor.shutdown(wait=True)
+            logging.info("Attendance scheduler stopped")
+
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,96 @@
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.utils.logger import logging
+
+
+class StubAttendanceServer:
+    """
+    Local stand-in for the attendance backend's POST /attendance/bulk.
+
+    Stores every accepted batch, answers a repeated Idempotency-Key with 409
+    (already stored) and can inject failures and latency to exercise the
+    publisher's retries.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, fail_first=0, fail_status=503, delay=0.0):
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.delay = delay
+        self.requests = 0
+        self.batches = {}       # Idempotency-Key -> records
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/attendance/bulk"
+
+    def records(self):
+        with self.lock:
+            return [record for batch in self.batches.values() for record in batch]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                key = self.headers.get("Idempotency-Key")
+                if stub.delay:
+                    time.sleep(stub.delay)
+
+                with stub.lock:
+                    stub.requests += 1
+                    if stub.requests <= stub.fail_first:
+                        status, reply = stub.fail_status, {"error": "injected failure"}
+                    elif key is not None and key in stub.batches:
+                        status, reply = 409, {"status": "duplicate"}
+                    else:
+                        records = json.loads(body)
+                        stub.batches[key or str(stub.requests)] = records
+                        status, reply = 200, {"status": "ok", "stored": len(records)}
+
+                data = json.dumps(reply).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="stub-attendance", daemon=True)
+        self.thread.start()
+        logging.info(f"Stub attendance server on {self.url}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub attendance backend for local testing")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fail-first", type=int, default=0, help="Answer the first N requests with 503")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds of latency per request")
+    args = parser.parse_args()
+
+    stub = StubAttendanceServer("0.0.0.0", args.port, fail_first=args.fail_first, delay=args.delay)
+    print(f"Listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(stub.batches, indent=4))
@@ -1,32 +1,47 @@
 from src.model.face_recognizer import FaceRecognizer
+from src.model.recognition_result import RecognitionResult
 from src.utils.exception import CustomException
 from src.utils.logger import logging
 
 from dataclasses import dataclass
 from collections import defaultdict
+import numpy as np
 import sys
 
 
 @dataclass
 class AttendanceMarkerConfig:
-    facerecognizer = FaceRecognizer()
+    pass
 
 
 class AttendanceMarker:
-    def __init__(self):
-        self.facerecognizer = AttendanceMarkerConfig.facerecognizer
+    def __init__(self, facerecognizer=None):
+        self.config = AttendanceMarkerConfig()
+        self._facerecognizer = facerecognizer
+
+    @property
+    def facerecognizer(self):
+        """Recognizer is only built when first needed (not at import time)"""
+        if self._facerecognizer is None:
+            self._facerecognizer = FaceRecognizer()
+        return self._facerecognizer
 
     def initiate_mark_attendance(
         self, recognizer_results: dict, all_students, threshold=2, min_conf=0.6
     ):
         """
-        recognizer_results: Dict -> {image_name: [recognized students]}
+        recognizer_results: Dict -> {image_name: [recognized students]}, or a
+            columnar RecognitionResult (aggregated without Python loops)
         all_students: List of all enrolled students
         threshold: Minimum number of images required to mark present
         min_conf: Minimum confidence score to consider recognition valid
         """
         try:
             logging.info("Mark attendance process started")
+            if isinstance(recognizer_results, RecognitionResult):
+                count_dict = self.count_structured(recognizer_results, min_conf)
+                return self.split_present_absent(count_dict, all_students, threshold)
+
             count_dict = defaultdict(int)
 
             # Loop through dictionary: image_name recognized_list
@@ -43,16 +58,65 @@ class AttendanceMarker:
                     if student_name != "Unknown" and conf >= min_conf:
                         count_dict[student_name] += 1
 
-            print("DEBUG: Count Dict =", dict(count_dict))  # Debug 
+            return self.split_present_absent(count_dict, all_students, threshold)
+
+        except Exception as e:
+            logging.error(f"Error in attendance marking: {str(e)}")
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def count_structured(result: RecognitionResult, min_conf):
+        """Vectorized group-by: number of distinct frames per identity"""
+        records = result.records
+        valid = records[(records["identity"] >= 0) & (records["score"] >= min_conf)]
+        n_frames = max(len(result.frame_names), 1)
+
+        # one (identity, frame) pair per student per image, like set() per image
+        pairs = np.unique(valid["identity"].astype(np.int64) * n_frames + valid["frame"])
+        counts = np.bincount(pairs // n_frames, minlength=len(result.identities))
+        return defaultdict(int, zip(result.identities, counts.tolist()))
+
+    @staticmethod
+    def split_present_absent(count_dict, all_students, threshold):
+        print("DEBUG: Count Dict =", dict(count_dict))  # Debug 
+
+        present_students = []
+        absent_students = []
+
+        for student in all_students:
+            if count_dict[student] >= threshold:
+                present_students.append(student)
+            else:
+                absent_students.append(student)
+
+        logging.info(f"Present Students: {present_students}")
+        logging.info(f"Absent Students: {absent_students}")
+
+        return present_students, absent_students
+
+
+    def mark_attendance_from_tracks(
+        self, track_evidence: list, all_students, threshold=2, min_conf=0.6
+    ):
+        """
+        track_evidence: List of per-track dicts from FaceRecognizer.track_frames
+            ({"name", "score", "frames", ...})
+        all_students: List of all enrolled students
+        threshold: Minimum number of frames a student must be tracked in
+        min_conf: Minimum best similarity of the track's identity
+        """
+        try:
+            logging.info("Mark attendance from tracks started")
+            count_dict = defaultdict(int)
 
-            present_students = []
-            absent_students = []
+            for track in track_evidence:
+                if track["name"] != "Unknown" and track["score"] >= min_conf:
+                    count_dict[track["name"]] += track["frames"]
 
-            for student in all_students:
-                if count_dict[student] >= threshold:
-                    present_students.append(student)
-                else:
-                    absent_students.append(student)
+            print("DEBUG: Track Count Dict =", dict(count_dict))
+
+            present_students = [s for s in all_students if count_dict[s] >= threshold]
+            absent_students = [s for s in all_students if count_dict[s] < threshold]
 
             logging.info(f"Present Students: {present_students}")
             logging.info(f"Absent Students: {absent_students}")
@@ -64,6 +128,65 @@ class AttendanceMarker:
             raise CustomException(e, sys)
 
 
+class StreamingAttendanceCounter:
+    """
+    Consumes recognition results frame by frame and keeps per-student hit
+    counts, so the pipeline can stop as soon as the roster is resolved.
+
+    A student is resolved once they reached `threshold` frames, or - when a
+    frame_budget is configured - once the frames left in the budget can no
+    longer bring them to the threshold.
+    """
+
+    def __init__(self, all_students, threshold=2, min_conf=0.6, frame_budget=0):
+        self.all_students = list(all_students)
+        self.threshold = threshold
+        self.min_conf = min_conf
+        self.frame_budget = frame_budget    # 0 = unknown length, stop only when all are present
+        self.count_dict = defaultdict(int)
+        self.frames_seen = 0
+        self.stopped_early = False
+
+    def update(self, frame_name, identities):
+        """
+        Args:
+            frame_name (str): Name of the processed frame.
+            identities (list): (name, score) of every face in the frame.
+
+        Returns:
+            bool: True when every rostered student is resolved and the
+            remaining frames cannot change the outcome.
+        """
+        self.frames_seen += 1
+        for name in {n for n, score in identities if n != "Unknown" and score >= self.min_conf}:
+            self.count_dict[name] += 1
+
+        if self.is_resolved():
+            self.stopped_early = True
+            logging.info(f"Roster resolved after {self.frames_seen} frames ({frame_name})")
+            return True
+        return False
+
+    def is_resolved(self):
+        remaining = self.frame_budget - self.frames_seen if self.frame_budget else None
+        for student in self.all_students:
+            count = self.count_dict[student]
+            if count >= self.threshold:
+                continue
+            if remaining is not None and count + remaining < self.threshold:
+                continue
+            return False
+        return True
+
+    def result(self):
+        present_students = [s for s in self.all_students if self.count_dict[s] >= self.threshold]
+        absent_students = [s for s in self.all_students if self.count_dict[s] < self.threshold]
+
+        logging.info(f"Present Students: {present_students}")
+        logging.info(f"Absent Students: {absent_students}")
+        return present_students, absent_students
+
+
 if __name__ == "__main__":
     obj = AttendanceMarker()
 
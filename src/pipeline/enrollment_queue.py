@@ -0,0 +1,187 @@
+import time
+import queue
+import threading
+from dataclasses import dataclass, field
+
+from src.utils.logger import logging
+from src.utils.metrics import metrics
+
+
+@dataclass
+class EnrollmentQueueConfig:
+    workers: int = 2                # concurrent enrollments (each holds crops + ONNX buffers)
+    max_pending: int = 32           # distinct USNs waiting; more uploads get HTTP 429
+    keep_finished: int = 1000       # finished jobs kept for /enroll_status
+
+
+@dataclass
+class EnrollmentJob:
+    usn: str
+    folder_path: str
+    images: list = field(default_factory=list)  # in-memory (file_name, bytes) uploads
+    append: bool = False            # add the images to the enrolled set instead of replacing it
+    state: str = "queued"           # queued, running, done, failed
+    uploads: int = 1                # uploads collapsed into this job
+    rerun: "EnrollmentJob" = None   # follow-up job for uploads that arrived while running
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+    result: object = None           # whatever enroll_fn returned
+    error: str = None
+    image_count: int = 0
+    done_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def wait(self, timeout=None):
+        return self.done_event.wait(timeout)
+
+    def to_dict(self):
+        now = time.time()
+        started = self.started_at or now
+        return {
+            "usn": self.usn,
+            "state": self.state,
+            "uploads": self.uploads,
+            "rerun_pending": self.rerun is not None,
+            "queued_s": round(started - self.submitted_at, 3),
+            "running_s": round((self.finished_at or now) - started, 3) if self.started_at else None,
+            "images": self.image_count or len(self.images),
+            "mode": "append" if self.append else "replace",
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class EnrollmentQueueFull(Exception):
+    pass
+
+
+class EnrollmentQueue:
+    """
+    Fixed pool of enrollment workers behind a bounded queue.
+
+    There is at most one pending job per USN: a repeated upload for a queued
+    USN is merged into that job. Uploads for a USN that is already running
+    are merged into exactly one follow-up job, so the latest images are
+    always embedded. A replacing upload discards the images of the uploads
+    merged before it; an appending one adds to them.
+    """
+
+    def __init__(self, enroll_fn, config: EnrollmentQueueConfig = None):
+        """
+        enroll_fn: enroll_fn(usn, folder_path, images, append) -> result
+            reported by /enroll_status (e.g. per-image face-found results)
+        """
+        self.config = config or EnrollmentQueueConfig()
+        self.enroll_fn = enroll_fn
+        self.lock = threading.Lock()
+        self.jobs = {}          # usn -> latest EnrollmentJob
+        self.finished = []      # finished USNs, oldest first
+        self.pending = queue.Queue()
+        self.workers = [
+            threading.Thread(target=self._work, name=f"enroll-{i}", daemon=True)
+            for i in range(self.config.workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def queued_count(self):
+        return sum(1 for job in self.jobs.values() if job.state == "queued")
+
+    def accepts(self, usn):
+        """Whether submit(usn) would currently be accepted (checked before saving uploads)"""
+        with self.lock:
+            job = self.jobs.get(usn)
+            if job is not None and job.state in ("queued", "running"):
+                return True
+            return self.queued_count() < self.config.max_pending
+
+    def submit(self, usn, folder_path, images=None, append=False):
+        """
+        Args:
+            usn (str): Student USN.
+            folder_path (str): Student image folder.
+            images (list, optional): (file_name, bytes) uploads to enroll from
+                memory.
+            append (bool): Add the images to the student's enrolled set
+                instead of replacing it.
+
+        Returns:
+            EnrollmentJob: The (possibly merged) job for this USN.
+
+        Raises:
+            EnrollmentQueueFull: max_pending USNs are already waiting.
+        """
+        with self.lock:
+            job = self.jobs.get(usn)
+            if job is not None and job.state == "queued":
+                self._merge(job, folder_path, images, append)
+                return job
+            if job is not None and job.state == "running":
+                if job.rerun is None:
+                    job.rerun = EnrollmentJob(usn, folder_path, uploads=0, append=True)
+                self._merge(job.rerun, folder_path, images, append)
+                return job.rerun
+
+            if self.queued_count() >= self.config.max_pending:
+                raise EnrollmentQueueFull(f"{self.config.max_pending} enrollments already queued")
+
+            job = EnrollmentJob(usn, folder_path, images=list(images or []), append=append)
+            self.jobs[usn] = job
+            if usn in self.finished:
+                self.finished.remove(usn)
+            self.pending.put(usn)
+            metrics.set("attendance_queue_depth", self.queued_count(), queue="enrollment")
+            return job
+
+    @staticmethod
+    def _merge(job, folder_path, images, append):
+        job.folder_path = folder_path
+        if append:
+            job.images.extend(images or [])
+        else:
+            job.images = list(images or [])
+            job.append = False
+        job.uploads += 1
+
+    def status(self, usn):
+        with self.lock:
+            job = self.jobs.get(usn)
+            return job.to_dict() if job is not None else None
+
+    def _work(self):
+        while True:
+            usn = self.pending.get()
+            with self.lock:
+                job = self.jobs[usn]
+                job.state = "running"
+                job.started_at = time.time()
+                metrics.set("attendance_queue_depth", self.queued_count(), queue="enrollment")
+
+            try:
+                with metrics.span("enroll"):
+                    result = self.enroll_fn(usn, job.folder_path, job.images, job.append)
+                state, error = "done", None
+            except Exception as e:
+                result, state, error = None, "failed", str(e)
+                logging.error(f"Enrollment failed for {usn}: {e}")
+
+            with self.lock:
+                job.state = state
+                job.error = error
+                job.result = result
+                job.finished_at = time.time()
+                job.image_count = len(job.images)
+                job.images = []     # release the upload bytes
+                metrics.inc("attendance_enrollments_total", state=state)
+                logging.info(f"Enrollment {state} for {usn}: {job.to_dict()}")
+
+                if job.rerun is not None:
+                    # Images uploaded while running: embed once more, ahead of the bound
+                    self.jobs[usn] = job.rerun
+                    self.pending.put(usn)
+                else:
+                    self.finished.append(usn)
+                    if len(self.finished) > self.config.keep_finished:
+                        self.jobs.pop(self.finished.pop(0), None)
+
+                job.done_event.set()
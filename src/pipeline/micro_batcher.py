@@ -0,0 +1,147 @@
+import time
+import queue
+import threading
+from dataclasses import dataclass
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from src.utils.logger import logging
+from src.utils.metrics import metrics
+
+
+@dataclass
+class MicroBatcherConfig:
+    max_batch_size: int = 16        # frames per batched inference
+    max_wait_ms: float = 10.0       # how long the first frame of a batch waits for company
+    max_queue: int = 256            # frames waiting; a request that would exceed it is refused whole
+
+
+class MicroBatcherBusy(Exception):
+    pass
+
+
+class MicroBatchRecognizer:
+    """
+    Dynamic micro-batching in front of one warm FaceRecognizer.
+
+    Frames submitted by concurrent requests are queued. A single inference
+    thread takes the first waiting frame, collects more for at most
+    max_wait_ms or until max_batch_size, and recognizes the whole batch in
+    one call to FaceRecognizer.iter_recognized (batched detection,
+    embedding and matching). Every frame's Future gets its own faces.
+    Frames whose Future was cancelled while waiting are skipped.
+    """
+
+    def __init__(self, recognizer, config: MicroBatcherConfig = None):
+        self.recognizer = recognizer
+        self.config = config or MicroBatcherConfig()
+        self.queue = queue.Queue()
+        self.waiting = 0        # frames reserved in the queue, bounded by max_queue
+        self.waiting_lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, frame):
+        """
+        Args:
+            frame (ndarray): BGR frame.
+
+        Returns:
+            Future: Resolves to a list of {"name", "score", "bbox", "det_score"}.
+
+        Raises:
+            MicroBatcherBusy: The queue is full.
+        """
+        return self.submit_all([frame])[0]
+
+    def submit_all(self, frames):
+        """
+        Queue the frames of one request all-or-nothing: queue capacity is
+        reserved for every frame before the first one is enqueued.
+
+        Returns:
+            list: One Future per frame (see submit).
+
+        Raises:
+            MicroBatcherBusy: The frames do not all fit in the queue.
+        """
+        with self.waiting_lock:
+            if self.waiting + len(frames) > self.config.max_queue:
+                metrics.inc("attendance_recognize_rejected_total", len(frames))
+                raise MicroBatcherBusy(f"{self.waiting} of {self.config.max_queue} queued frames taken")
+            self.waiting += len(frames)
+
+        futures = []
+        for frame in frames:
+            future = Future()
+            self.queue.put_nowait((time.perf_counter(), frame, future))
+            futures.append(future)
+        metrics.set("attendance_queue_depth", self.waiting, queue="recognize")
+        return futures
+
+    def recognize(self, frames, timeout=30.0):
+        """
+        Submit all frames of one request and wait up to `timeout` seconds
+        for all their results. On timeout the request's frames that have
+        not started are cancelled, so they cost no inference.
+        """
+        futures = self.submit_all(frames)
+        deadline = time.monotonic() + timeout
+        try:
+            return [future.result(timeout=max(deadline - time.monotonic(), 0)) for future in futures]
+        except FutureTimeout:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def _take(self, timeout=None):
+        """Next waiting frame whose Future is still wanted (marked running), releasing its slot"""
+        end = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            remaining = None if end is None else end - time.perf_counter()
+            item = self.queue.get(timeout=remaining) if remaining is None or remaining > 0 else self.queue.get_nowait()
+            with self.waiting_lock:
+                self.waiting -= 1
+            if item[2].set_running_or_notify_cancel():
+                return item
+
+    def _collect(self):
+        batch = [self._take()]
+        deadline = time.perf_counter() + self.config.max_wait_ms / 1000.0
+        while len(batch) < self.config.max_batch_size:
+            try:
+                batch.append(self._take(timeout=deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            metrics.set("attendance_queue_depth", self.waiting, queue="recognize")
+            frames = [(str(i), frame) for i, (_, frame, _) in enumerate(batch)]
+            try:
+                with metrics.span("recognize_batch"):
+                    results = [
+                        [
+                            {
+                                "name": face_matches[0][0],
+                                "score": round(face_matches[0][1], 4),
+                                "bbox": [round(float(v), 1) for v in face.bbox[:4]],
+                                "det_score": round(float(face.det_score), 4),
+                            }
+                            for face, face_matches in zip(faces, matches)
+                        ]
+                        for _, _, faces, matches in self.recognizer.iter_recognized(frames)
+                    ]
+            except Exception as e:
+                logging.error(f"Micro-batch of {len(batch)} frames failed: {e}")
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            now = time.perf_counter()
+            for (submitted, _, future), faces in zip(batch, results):
+                metrics.observe("attendance_recognize_latency_seconds", now - submitted)
+                future.set_result(faces)
+            metrics.inc("attendance_recognize_batches_total")
+            metrics.inc("attendance_recognize_frames_total", len(batch))
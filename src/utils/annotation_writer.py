@@ -0,0 +1,66 @@
+import queue
+import threading
+import cv2
+
+from src.utils.logger import logging
+from src.utils.metrics import metrics
+
+
+class AnnotationWriter:
+    """
+    Draws recognition boxes and writes annotated frames on a background
+    thread. The queue is bounded and submit() never blocks: when the disk
+    cannot keep up, frames are dropped and counted instead of stalling
+    recognition.
+    """
+
+    _STOP = object()
+
+    def __init__(self, max_queue: int = 64):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="annotation-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, save_path, frame, annotations):
+        """
+        Args:
+            save_path (str): Where to write the annotated JPEG.
+            frame (ndarray): BGR frame; copied, so the caller may reuse it.
+            annotations (list): (bbox, label) pairs to draw.
+
+        Returns:
+            bool: False if the frame was dropped because the queue is full.
+        """
+        try:
+            self.queue.put_nowait((save_path, frame.copy(), annotations))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            metrics.inc("attendance_annotations_dropped_total")
+            return False
+        finally:
+            metrics.set("attendance_queue_depth", self.queue.qsize(), queue="annotation")
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is self._STOP:
+                break
+            save_path, frame, annotations = item
+            try:
+                for bbox, label in annotations:
+                    cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), (0, 255, 0), 2)
+                    cv2.putText(frame, label, (bbox[0], bbox[1] - 10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+                cv2.imwrite(save_path, frame)
+                self.written += 1
+            except Exception as e:
+                logging.error(f"Could not write annotated frame {save_path}: {e}")
+
+    def close(self):
+        """Flush pending frames and stop the writer thread"""
+        self.queue.put(self._STOP)
+        self.thread.join()
+        logging.info(f"Annotation writer done: {self.written} written, {self.dropped} dropped")
@@ -1,11 +1,7 @@
 import cv2
 import numpy as np
-import insightface
-from insightface.app import FaceAnalysis
 
-# Initialize FaceAnalysis
-app = FaceAnalysis(name="buffalo_l", providers=['CPUExecutionProvider'])
-app.prepare(ctx_id=0, det_size=(640, 640))
+from src.model.model_registry import get_face_analysis
 
 # ---------- Blink Detection (using EAR) ----------
 def eye_aspect_ratio(eye_points):
@@ -41,35 +37,43 @@ def detect_head_movement(landmarks):
     return False
 
 # ---------- Main loop ----------
-cap = cv2.VideoCapture(0)
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    faces = app.get(frame)
-    if faces:
-        for face in faces:
-            # Draw bounding box
-            x1, y1, x2, y2 = face.bbox.astype(int)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-
-            # Extract landmarks (106)
-            lmk = face.landmark_2d_106
-
-            blinked = detect_blink(lmk)
-            moved = detect_head_movement(lmk)
-
-            if blinked or moved:
-                cv2.putText(frame, "REAL", (x1, y1 - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255,0), 2)
-            else:
-                cv2.putText(frame, "SPOOF?", (x1, y1 - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
-
-    cv2.imshow("Liveness Detection - InsightFace", frame)
-    if cv2.waitKey(1) & 0xFF == 27:  # ESC to exit
-        break
-
-cap.release()
-cv2.destroyAllWindows()
+def run_liveness(camera_index=0):
+    # Shared model from the registry, loaded on first call instead of at import
+    app = get_face_analysis(det_size=(640, 640))
+
+    cap = cv2.VideoCapture(camera_index)
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        faces = app.get(frame)
+        if faces:
+            for face in faces:
+                # Draw bounding box
+                x1, y1, x2, y2 = face.bbox.astype(int)
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+
+                # Extract landmarks (106)
+                lmk = face.landmark_2d_106
+
+                blinked = detect_blink(lmk)
+                moved = detect_head_movement(lmk)
+
+                if blinked or moved:
+                    cv2.putText(frame, "REAL", (x1, y1 - 10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255,0), 2)
+                else:
+                    cv2.putText(frame, "SPOOF?", (x1, y1 - 10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0,0,255), 2)
+
+        cv2.imshow("Liveness Detection - InsightFace", frame)
+        if cv2.waitKey(1) & 0xFF == 27:  # ESC to exit
+            break
+
+    cap.release()
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    run_liveness()
@@ -0,0 +1,194 @@
+import os
+import time
+import bisect
+import cProfile
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.utils.logger import logging
+
+
+# Latency buckets in seconds (1 ms .. 60 s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)     # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters, gauges and latency histograms, rendered in the
+    Prometheus text format. Series are keyed by (name, sorted labels).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.help = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def describe(self, name, text):
+        self.help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def value(self, name, **labels):
+        """Current value of a counter or gauge (0 if never set)"""
+        key = self._key(name, labels)
+        with self.lock:
+            return self.counters.get(key, self.gauges.get(key, 0))
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def span(self, stage, **labels):
+        """Time a block into the attendance_stage_seconds{stage=...} histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("attendance_stage_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+    def render(self):
+        """All series in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+                seen = set()
+                for (name, labels), value in sorted(series.items()):
+                    if name not in seen:
+                        seen.add(name)
+                        if name in self.help:
+                            lines.append(f"# HELP {name} {self.help[name]}")
+                        lines.append(f"# TYPE {name} {kind}")
+                    lines.append(f"{name}{_label_text(labels)} {value}")
+
+            seen = set()
+            for (name, labels), hist in sorted(self.histograms.items()):
+                if name not in seen:
+                    seen.add(name)
+                    if name in self.help:
+                        lines.append(f"# HELP {name} {self.help[name]}")
+                    lines.append(f"# TYPE {name} histogram")
+                cumulative = 0
+                bounds = [str(b) for b in hist.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, hist.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_label_text(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{_label_text(labels)} {hist.sum}")
+                lines.append(f"{name}_count{_label_text(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Plain dict of every series, e.g. for a session summary"""
+        with self.lock:
+            out = {}
+            for (name, labels), value in list(self.counters.items()) + list(self.gauges.items()):
+                out[name + _label_text(labels)] = value
+            for (name, labels), hist in self.histograms.items():
+                out[name + _label_text(labels)] = {"count": hist.count, "sum_s": round(hist.sum, 4)}
+            return out
+
+
+metrics = MetricsRegistry()
+metrics.describe("attendance_stage_seconds", "Wall time of pipeline stages")
+metrics.describe("attendance_frames_total", "Frames run through detection")
+metrics.describe("attendance_faces_total", "Faces matched against the gallery")
+metrics.describe("attendance_unknown_faces_total", "Faces below the match threshold")
+metrics.describe("attendance_queue_depth", "Items waiting in a bounded pipeline queue")
+metrics.describe("attendance_annotations_dropped_total", "Annotated frames dropped by a full writer queue")
+metrics.describe("attendance_sessions_total", "Attendance sessions run")
+metrics.describe("attendance_outbox_sent_total", "Sessions delivered to the attendance backend")
+metrics.describe("attendance_outbox_dead_total", "Sessions rejected by the attendance backend")
+metrics.describe("attendance_outbox_retries_total", "Failed publish attempts that will be retried")
+metrics.describe("attendance_enrollments_total", "Finished enrollment jobs by outcome")
+metrics.describe("attendance_enrollments_rejected_total", "Uploads refused with HTTP 429")
+metrics.describe("attendance_recognize_batches_total", "Micro-batches run by the /recognize service")
+metrics.describe("attendance_recognize_frames_total", "Frames recognized by the /recognize service")
+metrics.describe("attendance_recognize_rejected_total", "/recognize frames refused by a full queue")
+metrics.describe("attendance_recognize_timeouts_total", "/recognize requests answered 504 after waiting too long")
+metrics.describe("attendance_recognize_latency_seconds", "Queue wait plus inference per /recognize frame")
+metrics.describe("attendance_gallery_reloads_total", "Embedding galleries hot-swapped after a store change")
+metrics.describe("attendance_session_frames_per_second", "Recognition throughput of the last session")
+metrics.describe("attendance_session_faces_per_second", "Faces matched per second in the last session")
+metrics.describe("attendance_session_unknown_rate", "Share of Unknown faces in the last session")
+metrics.describe("attendance_capture_fps", "Grab rate of a live capture source in its last session")
+metrics.describe("attendance_capture_dropped_frames", "Frames a live capture source overwrote unread in its last session")
+
+
+@contextmanager
+def profile_session(profile_dir, name):
+    """cProfile the block and dump <profile_dir>/<name>.prof when profile_dir is set"""
+    if not profile_dir:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(profile_dir, exist_ok=True)
+        path = os.path.join(profile_dir, f"{name}.prof")
+        profiler.dump_stats(path)
+        logging.info(f"Profile written to {path}")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host="0.0.0.0"):
+    """/metrics on a background thread, for processes without the Flask app"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logging.info(f"Serving metrics on {host}:{port}/metrics")
+    return server
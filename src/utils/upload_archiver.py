@@ -0,0 +1,56 @@
+import os
+import queue
+import threading
+
+from src.utils.logger import logging
+from src.utils.metrics import metrics
+
+
+class UploadArchiver:
+    """
+    Persists original upload bytes for audit on a background thread, so the
+    request and the in-memory enrollment never wait on the disk. The queue
+    is bounded; when it is full submit() blocks instead of dropping, since
+    an audit copy must not be lost.
+    """
+
+    _STOP = object()
+
+    def __init__(self, max_queue: int = 256):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.failed = 0
+        self.thread = threading.Thread(target=self._run, name="upload-archiver", daemon=True)
+        self.thread.start()
+
+    def submit(self, save_path, data):
+        self.queue.put((save_path, data))
+        metrics.set("attendance_queue_depth", self.queue.qsize(), queue="upload_archive")
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is self._STOP:
+                break
+            save_path, data = item
+            try:
+                os.makedirs(os.path.dirname(save_path), exist_ok=True)
+                tmp_path = save_path + ".part"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, save_path)
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                logging.error(f"Could not archive upload {save_path}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """Block until every submitted upload is on disk"""
+        self.queue.join()
+
+    def close(self):
+        self.queue.put(self._STOP)
+        self.thread.join()
+        logging.info(f"Upload archiver done: {self.written} written, {self.failed} failed")